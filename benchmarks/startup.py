@@ -0,0 +1,94 @@
+# startup.py
+#
+# This file measures what importing and using the ORM costs a process before it touches the
+# database: CLI tools and workers that only build and validate model objects pay exactly this.
+#
+# It reports:
+#   - import time of `orm.base` and `models`, each in a fresh interpreter (best of N runs)
+#   - which drivers and heavy modules (mysql.connector, sqlite3, numpy, asyncio) the import
+#     pulled in; none should be
+#   - cost of constructing a model instance, and of hydrating one from a result row
+#
+# Example usage (from the repository root):
+#
+#   python benchmarks/startup.py
+#   python benchmarks/startup.py --runs 10 --json > startup.json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("mysql.connector", "sqlite3", "numpy", "asyncio")
+
+# Run in a child interpreter: import one module, report its import time and what got loaded.
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+# Import `module` in a fresh interpreter `runs` times; return the best time and loaded modules.
+def measure_import(module, runs):
+    best, loaded = None, []
+    for _ in range(runs):
+        probe = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output)
+        if best is None or result["seconds"] < best:
+            best = result["seconds"]
+        loaded = result["loaded"]
+    return {"seconds": best, "heavy_modules_loaded": loaded}
+
+
+# Return the best per-call time of `func` in seconds, over `repeat` rounds of `number` calls.
+def measure_call(func, number, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ORM import and model construction cost.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per import measurement")
+    parser.add_argument("--number", type=int, default=100000, help="calls per construction measurement")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from models import Customer
+
+    row = {"id": 1, "name": "Shaurya", "email": "shaurya@example.com", "phone": "9999999999",
+           "is_active": 1}
+    results = {
+        "import_orm_base": measure_import("orm.base", args.runs),
+        "import_models": measure_import("models", args.runs),
+        "construct_instance_seconds": measure_call(
+            lambda: Customer(name="Shaurya", email="shaurya@example.com", phone="9999999999"),
+            args.number,
+        ),
+        "hydrate_row_seconds": measure_call(lambda: Customer._hydrate("customer", [row]), args.number),
+        "heavy_modules_loaded_after_construction": [m for m in HEAVY_MODULES if m in sys.modules],
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"import orm.base:      {results['import_orm_base']['seconds'] * 1000:8.2f} ms")
+    print(f"import models:        {results['import_models']['seconds'] * 1000:8.2f} ms")
+    print(f"construct instance:   {results['construct_instance_seconds'] * 1e6:8.2f} us")
+    print(f"hydrate one row:      {results['hydrate_row_seconds'] * 1e6:8.2f} us")
+    loaded = sorted(set(results["import_models"]["heavy_modules_loaded"])
+                    | set(results["heavy_modules_loaded_after_construction"]))
+    print(f"heavy modules loaded: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,7 +32,7 @@ class Customer(Base):
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True)
     phone = Column(String(15))
-    address = Column(String(255))
+    address = Column(String(255), deferred=True)
     is_active = Column(Boolean(), default=True)
 
 
@@ -48,7 +48,10 @@ class Product(Base):
 
 # Model: Rental
 # Represents a rental transaction between customer and product.
+# Rentals are sharded by customer when the models are bound to a ShardedDatabase.
 class Rental(Base):
+    shard_key = 'customer_id'
+
     id = Column(Integer(), primary_key=True)
     customer_id = Column(Integer(), foreign_key="Customer(id)")
     product_id = Column(Integer(), foreign_key="Product(id)")
@@ -0,0 +1,261 @@
+# aio.py
+#
+# This file defines the asyncio support of the ORM: an `AsyncPool` of database connections and
+# the machinery behind the `async` methods of `Base` (`aget()`, `aget_all()`, `aquery()`,
+# `asave()`, `abulk_save()` and `astream()`).
+#
+# The drivers the ORM uses (mysql.connector, sqlite3) are blocking, so the pool runs each
+# operation on a worker thread of its own, with a pooled connection bound to the call (see
+# `dbconnectors.bound_connection()`). The event loop is never blocked, and it can keep as many
+# queries in flight as the pool has connections:
+#
+#   async def rentals_page(customer_id):
+#       customer = await Customer.aget('customer', customer_id)
+#       rentals = await Rental.aquery(customer_id=customer_id)
+#       return customer, rentals
+#
+#   async for rental in Rental.astream(chunk_size=500):   # rows fetched in chunks
+#       ...
+#
+# Concurrency and cancellation:
+#   - At most `max_size` operations run at once; further calls wait for a free slot.
+#   - A cancelled task does not return its connection while its query is still running on the
+#     worker thread. The connection and slot are released when the query finishes, so a
+#     connection is never handed to two operations at once.
+#   - A connection on which a statement failed or a rollback ran (the ORM methods catch their
+#     own errors, so the call itself may still return), or whose stream was abandoned with
+#     unread rows, is closed instead of going back to the pool.
+#   - A connection ends its transaction (rollback) before it goes back to the pool. The ORM
+#     read paths never commit, and with autocommit off (the MySQL default) under REPEATABLE
+#     READ a pooled connection would otherwise keep reading the snapshot of its first SELECT.
+#     Writes are committed by the ORM methods themselves, so the rollback discards nothing.
+#   - With a ReplicatedDatabase, read connections are not pooled: each read asks the connector
+#     for a connection, so replica rotation, busy counts and ejection keep working. Reads
+#     inside a session's read-your-writes window use primary connections.
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .dbconnectors import bound_connection
+
+
+def _succeeded(future):
+    return not future.cancelled() and future.exception() is None
+
+
+class _PooledConnection:
+    # A pooled connection handed to the ORM for one call. The ORM closes every connection it
+    # is given when it is done; here that returns it to the pool instead. `failed` records a
+    # failed statement or a rollback, after which the connection is not reused.
+    def __init__(self, connection):
+        self.connection = connection
+        self.failed = False
+        self.closed = False
+
+    def cursor(self, dictionary=False):
+        return _PooledCursor(self, self.connection.cursor(dictionary=dictionary))
+
+    def rollback(self):
+        self.failed = True
+        self.connection.rollback()
+
+    def close(self):
+        pass
+
+    def discard(self):
+        # Really close the connection (once), instead of returning it to the pool.
+        if not self.closed:
+            self.closed = True
+            self.connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+class _PooledCursor:
+    # Marks its connection as failed when a statement or fetch raises.
+    def __init__(self, pooled, cursor):
+        self._pooled = pooled
+        self._cursor = cursor
+
+    def _call(self, func, *args):
+        try:
+            return func(*args)
+        except Exception:
+            self._pooled.failed = True
+            raise
+
+    def execute(self, sql, params=()):
+        return self._call(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._call(self._cursor.executemany, sql, seq_of_params)
+
+    def fetchone(self):
+        return self._call(self._cursor.fetchone)
+
+    def fetchmany(self, size=1):
+        return self._call(self._cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._call(self._cursor.fetchall)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class AsyncPool:
+    def __init__(self, connector, max_size=10):
+        """
+        Args:
+            connector: any connector with `connect(readonly=...)` (MySQL, SQLite,
+                ReplicatedDatabase, ...)
+            max_size: maximum number of operations (and connections) in flight at once
+        """
+        self.connector = connector
+        self.max_size = max_size
+        self._slots = asyncio.Semaphore(max_size)
+        self._idle = {False: [], True: []}  # readonly flag -> idle connections
+        # A routing connector (ReplicatedDatabase) picks a replica per read connection.
+        self._pool_reads = getattr(connector, "reads_from_primary", None) is None
+        self._executor = ThreadPoolExecutor(max_size, thread_name_prefix="orm-async")
+
+    async def run(self, func, *args, readonly=False):
+        """Run a blocking ORM call on a pooled connection and return its result."""
+        primary_only = self._reads_from_primary()
+        readonly = readonly and not primary_only
+        await self._slots.acquire()
+        try:
+            conn = await self._acquire(readonly)
+        except BaseException:
+            self._slots.release()
+            raise
+        future = self._submit(self._call, conn, readonly, func, args)
+        future.add_done_callback(lambda done: self._release(conn, readonly, _succeeded(done)))
+        # shield(): cancelling the caller must not detach the connection from a running query.
+        return await asyncio.shield(future)
+
+    async def stream(self, sql, params=(), chunk_size=500, readonly=True):
+        """Execute a SELECT on one pooled connection and yield its rows in chunks."""
+        primary_only = self._reads_from_primary()
+        readonly = readonly and not primary_only
+        await self._slots.acquire()
+        try:
+            conn = await self._acquire(readonly)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        state = {"cursor": None, "pending": None, "finished": False}
+
+        def open_cursor():
+            cursor = conn.cursor(dictionary=True)
+            state["cursor"] = cursor
+            cursor.execute(sql, params)
+            return cursor
+
+        try:
+            state["pending"] = self._submit(open_cursor)
+            cursor = await asyncio.shield(state["pending"])
+            while True:
+                state["pending"] = self._submit(cursor.fetchmany, chunk_size)
+                rows = await asyncio.shield(state["pending"])
+                if not rows:
+                    state["finished"] = True
+                    break
+                yield rows
+        finally:
+            self._finish_stream(conn, readonly, state)
+
+    def _finish_stream(self, conn, readonly, state):
+        # Close the cursor and release the connection once no fetch is running on it.
+        def cleanup(_=None):
+            cleanup_future = self._submit(self._close_stream, conn, readonly, state["cursor"])
+            cleanup_future.add_done_callback(
+                lambda done: self._release(conn, readonly, state["finished"] and _succeeded(done))
+            )
+
+        pending = state["pending"]
+        if pending is None or pending.done():
+            cleanup()
+        else:
+            pending.add_done_callback(cleanup)
+
+    async def close(self):
+        """Close idle connections and stop the worker threads."""
+        idle = self._idle[False] + self._idle[True]
+        self._idle = {False: [], True: []}
+        for conn in idle:
+            await self._submit(conn.close)
+        self._executor.shutdown(wait=False)
+
+    async def _acquire(self, readonly):
+        idle = self._idle[readonly]
+        if idle:
+            return idle.pop()  # never holds routed read connections (see _release())
+        future = self._submit(functools.partial(self.connector.connect, readonly=readonly))
+        try:
+            return _PooledConnection(await asyncio.shield(future))
+        except asyncio.CancelledError:
+            # Keep the connection for the next caller once the connect finishes.
+            def keep(done):
+                if _succeeded(done):
+                    self._release(_PooledConnection(done.result()), readonly, True, slot=False)
+            future.add_done_callback(keep)
+            raise
+
+    def _reads_from_primary(self):
+        # A ReplicatedDatabase keeps a session's reads on the primary right after its writes.
+        # Called in the caller's task, so its session exists before the context is copied.
+        check = getattr(self.connector, "reads_from_primary", None)
+        return check is not None and check()
+
+    def _release(self, conn, readonly, reusable, slot=True):
+        if reusable and not conn.failed and (self._pool_reads or not readonly):
+            self._idle[readonly].append(conn)
+        elif not conn.closed:
+            self._submit(conn.discard)
+        if slot:
+            self._slots.release()
+
+    def _submit(self, func, *args):
+        # Run func on a worker thread, in a copy of the caller's context (read-your-writes
+        # session, etc.).
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, functools.partial(context.run, func, *args))
+
+    def _call(self, conn, readonly, func, args):
+        try:
+            with bound_connection(conn):
+                return func(*args)
+        finally:
+            note_write = getattr(self.connector, "note_write", None)
+            if not readonly and note_write is not None:
+                note_write()  # a reused primary connection does not report its writes itself
+            if readonly and not self._pool_reads:
+                conn.discard()  # closed before the caller resumes, releasing the replica
+            else:
+                self._end_transaction(conn)
+
+    def _close_stream(self, conn, readonly, cursor):
+        self._close_cursor(cursor)
+        if readonly and not self._pool_reads:
+            conn.discard()
+        else:
+            self._end_transaction(conn)
+
+    @staticmethod
+    def _end_transaction(conn):
+        # Roll back on the raw connection: `_PooledConnection.rollback()` would mark it failed.
+        try:
+            conn.connection.rollback()
+        except Exception:
+            conn.failed = True
+
+    @staticmethod
+    def _close_cursor(cursor):
+        if cursor is not None:
+            cursor.close()
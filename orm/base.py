@@ -3,15 +3,31 @@
 # This file defines the `Base` class, which serves as the foundation for all ORM models.
 # The `Base` class provides essential methods for interacting with the database, such as:
 #   - `save()`: Insert or update the current model instance in the database.
+#   - `assign_id()`: Give a new instance its primary key before it is written (see `sequences.py`).
+#   - `use()`: Bind models to a connector, e.g. a primary with read replicas (`ReplicatedDatabase`).
+#   - `transaction()`: Group operations on one primary connection, committed or rolled back together.
+#   - `bulk_save()`: Write a whole object graph of new and changed instances in one transaction.
+#   - `validate_batch()`: Check rows against the model's column codecs before any SQL is sent.
 #   - `_insert()`: Insert the current instance into the database (private method).
 #   - `_update()`: Update the current instance in the database (private method).
 #   - `get()`: Retrieve a record by its ID.
 #   - `delete()`: Delete a record by its ID.
 #   - `get_all()`: Retrieve all records of the model from the database.
 #   - `query()`: Query records based on filter conditions.
+#   - `only()` / `defer()`: Limit the columns fetched by `get()`, `get_all()` and `query()`.
+#     Columns left out (and columns declared with `deferred=True`) are loaded lazily on first
+#     attribute access, in one batch for every object returned by the same read.
 #   - `create_table()`: Create a table in the database based on the model's schema.
 #   - `create_schema()`: Generate the schema for the model in the database.
 #   - `join()`: Join multiple models together for data retrieval.
+#   - `order_by()`: Sort the rows returned by `get_all()` and `query()`.
+#   - `aggregate()` / `count()`: COUNT, SUM, MIN, MAX or AVG over the model's table.
+#   - `aget()`, `aget_all()`, `aquery()`, `asave()`, `abulk_save()`, `astream()`: asyncio
+#     counterparts of the methods above, run through an async connection pool (see `aio.py`).
+#   - `parallel_scan()`: Stream the whole table over several connections, split by key range.
+#   - `shard_key`: Spread a model's rows over a `ShardedDatabase` (see `sharding.py`).
+#   - `explain.enable()`: Capture EXPLAIN plans of the statements the methods above issue and
+#     report full scans with a suggested index (see `explain.py`).
 #   - `where()`: Add WHERE conditions to queries.
 #   - `having()`: Add HAVING conditions to queries.
 #   - `group_by()`: Add GROUP BY clauses to queries.
@@ -55,86 +71,534 @@
 #
 # The `Base` class is meant to be subclassed, and any model that extends `Base` will automatically
 # inherit the methods for database interaction.
+#
+# Startup cost: defining a model registers it in `model_registry` and precomputes its table name
+# and column list once. Instances hold no connector; the process-wide one is created by the first
+# database call (see `_backend()`), and mysql.connector, NumPy and asyncio are only imported by
+# the code paths that use them. `benchmarks/startup.py` tracks import and construction times.
+
+
+import functools
+import heapq
+import itertools
+import queue
+import threading
+import weakref
+
+from .dbconnectors import MySQL, pinned_connection, transaction
+from .columns import Column
+from .datatypes import ValidationError
+from .sequences import get_allocator, reset_allocators
+from .sharding import ALL_SHARDS, ShardedDatabase, put_until_stopped
+
+
+# Maximum number of ids per `WHERE id IN (...)` when lazily loading a deferred column.
+_LAZY_LOAD_CHUNK = 500
+
+
+def _column_list(columns, order_by=()):
+    # Render a SELECT column list; None means every column. ORDER BY columns are always
+    # selected so that results from several shards can be merged in order.
+    if columns is None:
+        return "*"
+    extra = [part.split()[0] for part in order_by if part.split()[0] not in columns]
+    return ", ".join(list(columns) + extra)
+
+
+def _order_clause(order_by):
+    # Render an ORDER BY clause from entries like "rental_date" or "total_price DESC".
+    return f" ORDER BY {', '.join(order_by)}" if order_by else ""
+
+
+# Aggregates that `Base.aggregate()` can combine across shards.
+_AGGREGATES = {"COUNT", "SUM", "MIN", "MAX", "AVG"}
+
+# Every model class, by class name, filled in as models are defined (see `__init_subclass__`).
+model_registry = {}
+
+# Process-wide default connector, created on first use when no connector is set with `use()`.
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+# Async pools per event loop and connector, created by `Base._async_pool()`.
+_async_pools = weakref.WeakKeyDictionary()
+
+# Messages passed from `parallel_scan()` workers to the consuming generator.
+_CHUNK, _DONE = "chunk", "done"
+
+
+def _split_range(low, high, parts):
+    # Split the inclusive integer range [low, high] into at most `parts` contiguous ranges.
+    if not isinstance(low, int) or not isinstance(high, int):
+        raise ValueError("parallel_scan() needs an integer partition column")
+    step = max(1, -(-(high - low + 1) // parts))  # ceiling division
+    return [(start, min(high, start + step - 1)) for start in range(low, high + 1, step)]
+
+
+class _ResultSet:
+    # The objects hydrated by one read, so a lazy load on one of them can fill in all of them.
+    def __init__(self, table):
+        self.table = table
+        self._members = []
+
+    def add(self, obj):
+        self._members.append(weakref.ref(obj))
 
+    def members(self):
+        return [obj for obj in (ref() for ref in self._members) if obj is not None]
 
-from dbconnectors import MySQL
-from columns import Column
+
+class _Projection:
+    # A model bound to an explicit column list and ordering, returned by `Base.only()`,
+    # `Base.defer()` and `Base.order_by()`.
+    #
+    #   Customer.only('id', 'name').get_all()
+    #   Customer.defer('address').query(is_active=True)
+    #   Rental.order_by('rental_date DESC').get_all()
+    def __init__(self, model, columns, order_by=()):
+        self.model = model
+        self.columns = columns
+        self.ordering = tuple(order_by)
+
+    def order_by(self, *columns):
+        return _Projection(self.model, self.columns, columns)
+
+    def get(self, table, id):
+        return self.model._get(table, id, self.columns)
+
+    def get_all(self, table=None):
+        return self.model._get_all(table, self.columns, self.ordering)
+
+    def query(self, **filters):
+        return self.model._query(filters, self.columns, self.ordering)
+
+
+def _dependency_order(models):
+    # Order model classes so that tables referenced by a foreign key come first.
+    remaining = list(models)
+    ordered = []
+    while remaining:
+        tables = {model._table for model in remaining}
+        for model in remaining:
+            parents = {
+                column.foreign_key.split("(")[0].strip().lower()
+                for column in model._columns().values()
+                if column.is_foreign_key()
+            }
+            if not (parents - {model._table}) & tables:
+                break
+        else:
+            model = remaining[0]  # foreign-key cycle: keep the caller's order
+        remaining.remove(model)
+        ordered.append(model)
+    return ordered
 
 
 class Base:
+    # Number of primary keys reserved from the sequence table per round trip.
+    id_block_size = 50
+
+    # Connector set with `use()`, e.g. a ReplicatedDatabase; None means the default MySQL().
+    _database = None
+
+    # Column that distributes rows across a ShardedDatabase (see `sharding.py`); None = unsharded.
+    shard_key = None
+
+    # Maximum number of async operations in flight per event loop (see `aio.py`).
+    async_pool_size = 10
+
+    # Set by `explain.enable()`: connections record their statements (see `explain.py`).
+    _watch_statements = False
+
+    # Precomputed per model by `__init_subclass__`.
+    _table = None
+    _column_map = {}
+    _default_columns = None
+
+    def __init_subclass__(cls, **kwargs):
+        # Register the model and precompute its table name and column metadata once, when the
+        # class is defined, instead of on every query.
+        super().__init_subclass__(**kwargs)
+        cls._table = cls.__name__.lower()
+        columns = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Column):
+                    columns[name] = value
+        cls._column_map = columns
+        cls._default_columns = cls._select_columns()
+        model_registry[cls.__name__] = cls
+
     def __init__(self, **kwargs):
         # Initialize model instance with attributes.
-        self._db = MySQL() # instance of MySQL connector
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    def __setattr__(self, name, value):
+        # A column assigned by the user is no longer waiting for a deferred load.
+        unloaded = self.__dict__.get('_unloaded')
+        if unloaded:
+            unloaded.discard(name)
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def _backend(cls):
+        # Return the connector for this model: the one set with `use()`, or the process-wide
+        # default MySQL connector. Nothing is connected (or imported) until first use.
+        if cls._database is not None:
+            return cls._database
+        global _default_backend
+        if _default_backend is None:
+            with _default_backend_lock:
+                if _default_backend is None:
+                    _default_backend = MySQL()
+        return _default_backend
+
 
     def save(self):
-    # Insert or update the record in the database.
-       if hasattr(self, 'id') and self.id is not None:
-        self._update()
-       else:
-        self._insert()
+        # Insert or update the record in the database.
+        # New objects get their id from the model's allocator before the INSERT,
+        # so `self.id` is usable (e.g. as a foreign key) right after save().
+        if self.__dict__.get('id') is None:
+            self.assign_id()
+        if self.__dict__.get('_pending_insert'):
+            self._insert()
+        else:
+            self._update()
+
+    def assign_id(self):
+        # Give this instance a primary key without writing the row yet.
+        if self.__dict__.get('id') is None:
+            self.id = self._id_allocator().next_id()
+            self._pending_insert = True
+        return self.id
+
+    @classmethod
+    def use(cls, database):
+        # Bind this model (and its subclasses) to a connector, e.g. Base.use(ReplicatedDatabase(...)).
+        # Id allocators are rebuilt, so they pick up the new connector and `id_block_size`.
+        cls._database = database
+        reset_allocators()
+
+    @classmethod
+    def _connect(cls, readonly=False, shard_value=ALL_SHARDS):
+        # Return a connection for one operation. Inside `transaction()` this is the pinned
+        # primary connection; otherwise the connector may route reads to a replica.
+        # Sharded models get the shard owning `shard_value`, or a scatter-gather
+        # connection over every shard when it is ALL_SHARDS.
+        # With `explain.enable()` the connection records its statements (see `explain.py`).
+        db = cls._backend()
+        if cls._is_sharded(db):
+            conn = db.connect(readonly=readonly, key=shard_value)
+        else:
+            conn = pinned_connection()
+            if conn is None:
+                conn = db.connect(readonly=readonly)
+        if Base._watch_statements:
+            from . import explain  # only imported once enabled
+
+            conn = explain.watch(conn, cls)
+        return conn
+
+    @classmethod
+    def _is_sharded(cls, db):
+        return cls.shard_key is not None and isinstance(db, ShardedDatabase)
+
+    @classmethod
+    def transaction(cls):
+        # Run several operations on one primary connection, committed together:
+        #
+        #   with Base.transaction():
+        #       customer.save()
+        #       Rental.query(customer_id=customer.id)   # read on the primary, sees the insert
+        return transaction(cls._backend())
+
+    @classmethod
+    def _id_allocator(cls):
+        # Return the process-wide hi/lo allocator for this model's table.
+        # Sharded tables share one sequence on the home shard, seeded past the highest id
+        # on any shard, so ids stay unique across shards.
+        table = cls._table
+        db = cls._backend()
+        start = (lambda: db.max_id(table) + 1) if cls._is_sharded(db) else None
+        return get_allocator(table, db, table=table, block_size=cls.id_block_size, start=start)
+
+    @classmethod
+    def _columns(cls):
+        # Return the model's Column definitions as {attribute name: Column}, in declaration order.
+        return cls._column_map
+
+    @classmethod
+    def _codecs(cls):
+        # Return {column name: Codec} for the model, compiled once per class.
+        codecs = cls.__dict__.get('_codec_cache')
+        if codecs is None:
+            codecs = {name: column.codec() for name, column in cls._columns().items()}
+            cls._codec_cache = codecs
+        return codecs
+
+    @classmethod
+    def validate_batch(cls, rows, new=False):
+        # Validate a list of {column: value} rows column by column; raise ValidationError
+        # listing every bad value. Columns missing from a row are not checked, except in rows
+        # about to be inserted (`new`: True, or one flag per row), where a missing NOT NULL
+        # column is checked as NULL. The primary key is left to the id allocator.
+        flags = list(new) if isinstance(new, (list, tuple)) else [new] * len(rows)
+        columns = cls._columns()
+        errors = []
+        for name, codec in cls._codecs().items():
+            column = columns[name]
+            required = not column.nullable and not column.primary_key
+            positions, values = [], []
+            for i, row in enumerate(rows):
+                if name in row:
+                    positions.append(i)
+                    values.append(row[name])
+                elif required and flags[i]:
+                    positions.append(i)
+                    values.append(None)
+            if not positions:
+                continue
+            for j, message in codec.validate_many(values):
+                errors.append((positions[j], message))
+        if errors:
+            raise ValidationError(cls.__name__, sorted(errors))
+
+    @classmethod
+    def _to_db(cls, fields):
+        # Convert a row's Python values to what the driver expects.
+        codecs = cls._codecs()
+        return {
+            name: codecs[name].to_db(value) if name in codecs and value is not None else value
+            for name, value in fields.items()
+        }
+
+    @classmethod
+    def _from_db(cls, row):
+        # Convert a fetched row's values back to Python values.
+        codecs = cls._codecs()
+        return {
+            name: codecs[name].from_db(value) if name in codecs and value is not None else value
+            for name, value in row.items()
+        }
+
+    def _fields(self):
+        # Return the instance's public attributes as {column name: value}.
+        return {attr: val for attr, val in self.__dict__.items() if not attr.startswith('_')}
 
     def _insert(self):
-        #Insert the current instance into the database."""
-         conn = self._db.connect()
-         cursor = conn.cursor()
-    try:
-        table = self.__class__.__name__.lower()
-        fields = []
-        values = []
-        for attr, val in self.__dict__.items():
-            if not attr.startswith('_'):
-                fields.append(attr)
-                values.append(val)
-        columns_str = ", ".join(fields)
-        placeholders = ", ".join(["%s"] * len(values))
-        sql = f"INSERT INTO {table} ({columns_str}) VALUES ({placeholders})"
-        cursor.execute(sql, values)
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        print(f"Insert failed: {e}")
-    finally:
-        cursor.close()
-        conn.close()
-    
+        # Insert the current instance into the database.
+        conn = self._connect(shard_value=self.__dict__.get(self.shard_key))
+        cursor = conn.cursor()
+        try:
+            table = self._table
+            self.validate_batch([self._fields()], new=True)
+            fields = self._to_db(self._fields())
+            columns_str = ", ".join(fields)
+            placeholders = ", ".join(["%s"] * len(fields))
+            sql = f"INSERT INTO {table} ({columns_str}) VALUES ({placeholders})"
+            cursor.execute(sql, list(fields.values()))
+            conn.commit()
+            self._pending_insert = False
+        except Exception as e:
+            conn.rollback()
+            print(f"Insert failed: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
 
     def _update(self):
         # Update the current instance in the database.
-        conn = self._db.connect()
+        conn = self._connect(shard_value=self.__dict__.get(self.shard_key, ALL_SHARDS))
         cursor = conn.cursor()
-    try:
-        table = self.__class__.__name__.lower()
-        fields = []
-        values = []
-        for attr, val in self.__dict__.items():
-            if not attr.startswith('_') and attr != 'id':
-                fields.append(f"{attr} = %s")
-                values.append(val)
-        values.append(self.id)  # for WHERE condition
-        sql = f"UPDATE {table} SET {', '.join(fields)} WHERE id = %s"
-        cursor.execute(sql, values)
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        print(f"Update failed: {e}")
-    finally:
-        cursor.close()
-        conn.close()
+        try:
+            table = self._table
+            fields = []
+            values = []
+            self.validate_batch([self._fields()])
+            for attr, val in self._to_db(self._fields()).items():
+                if attr != 'id':
+                    fields.append(f"{attr} = %s")
+                    values.append(val)
+            values.append(self.id)  # for WHERE condition
+            sql = f"UPDATE {table} SET {', '.join(fields)} WHERE id = %s"
+            cursor.execute(sql, values)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Update failed: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
+
+    @classmethod
+    def bulk_save(cls, objects):
+        # Write a whole object graph (e.g. Customers and their Rentals) in one transaction.
+        # Every row is validated against the column codecs first, so a bad value rejects
+        # the whole batch before any SQL is sent. Ids for new objects are reserved in one
+        # block per model, parents are written before the children that reference them,
+        # and rows with the same shape share a single executemany() call.
+        groups = {}
+        for obj in objects:
+            groups.setdefault(type(obj), []).append(obj)
+        for model, items in groups.items():
+            new = [obj.__dict__.get('id') is None or bool(obj.__dict__.get('_pending_insert')) for obj in items]
+            model.validate_batch([obj._fields() for obj in items], new=new)
+
+        for model, items in groups.items():
+            new = [obj for obj in items if obj.__dict__.get('id') is None]
+            for obj, new_id in zip(new, model._id_allocator().next_ids(len(new))):
+                obj.id = new_id
+                obj._pending_insert = True
+
+        # One connection per target: a shard index, or None when there is no ShardedDatabase.
+        # Unsharded models live on the home shard (0) and share its connection, so their rows
+        # are visible to the foreign keys of sharded rows written there. Writes to several
+        # shards are committed one shard after another, not atomically.
+        db = cls._backend()
+        home = 0 if isinstance(db, ShardedDatabase) else None
+        connections = {}
+        try:
+            for model in _dependency_order(groups):
+                table = model._table
+                sharded = model._is_sharded(db)
+                batches = {}
+                for obj in groups[model]:
+                    fields = model._to_db(obj._fields())
+                    kind = 'insert' if obj.__dict__.get('_pending_insert') else 'update'
+                    target = db.shard_for(obj.__dict__.get(model.shard_key)) if sharded else home
+                    batches.setdefault((target, kind, tuple(fields)), []).append(fields)
+
+                for (target, kind, names), rows in batches.items():
+                    if target not in connections:
+                        connections[target] = cls._connect() if target is None else db.connect_shard(target)
+                    cursor = connections[target].cursor()
+                    if kind == 'insert':
+                        placeholders = ", ".join(["%s"] * len(names))
+                        sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({placeholders})"
+                        params = [[row[name] for name in names] for row in rows]
+                    else:
+                        names = [name for name in names if name != 'id']
+                        assignments = ", ".join(f"{name} = %s" for name in names)
+                        sql = f"UPDATE {table} SET {assignments} WHERE id = %s"
+                        params = [[row[name] for name in names] + [row['id']] for row in rows]
+                    cursor.executemany(sql, params)
+                    cursor.close()
+            for conn in connections.values():
+                conn.commit()
+            for items in groups.values():
+                for obj in items:
+                    obj._pending_insert = False
+        except Exception as e:
+            for conn in connections.values():
+                conn.rollback()
+            print(f"Bulk save failed: {e}")
+        finally:
+            for conn in connections.values():
+                conn.close()
+
+
+    @classmethod
+    def only(cls, *columns):
+        # Restrict the next read to the given columns; the rest load lazily on first access.
+        return _Projection(cls, cls._select_columns(only=columns))
+
+    @classmethod
+    def defer(cls, *columns):
+        # Leave the given columns out of the next read; they load lazily on first access.
+        return _Projection(cls, cls._select_columns(defer=columns))
+
+    @classmethod
+    def order_by(cls, *columns):
+        # Sort the next read, e.g. Rental.order_by('rental_date DESC').get_all().
+        return _Projection(cls, cls._default_columns, columns)
+
+    @classmethod
+    def _select_columns(cls, only=None, defer=()):
+        # Return the column list for a SELECT, or None to select every column.
+        # Columns declared with `deferred=True` are left out unless named in `only`.
+        declared = cls._columns()
+        if not declared:
+            return None
+        if only:
+            names = list(only)
+        else:
+            names = [name for name, column in declared.items() if not column.deferred]
+        names = [name for name in names if name not in defer]
+        if 'id' not in names:
+            names.insert(0, 'id')
+        return names
+
+    @classmethod
+    def _hydrate(cls, table, rows):
+        # Turn result rows into model instances that share one result set for lazy loading.
+        result_set = _ResultSet(table)
+        declared = cls._columns()
+        objects = []
+        fast = cls.__init__ is Base.__init__  # no custom __init__ to run
+        for row in rows:
+            values = cls._from_db(row)
+            if fast:
+                obj = cls.__new__(cls)
+                obj.__dict__.update(values)
+            else:
+                obj = cls(**values)
+            obj._result_set = result_set
+            obj._unloaded = {name for name in declared if name not in row}
+            result_set.add(obj)
+            objects.append(obj)
+        return objects
+
+    def _load_deferred(self, name):
+        # Load a column left out of the original SELECT, for every object of the same
+        # result set that is still missing it, with one `WHERE id IN (...)` per chunk.
+        result_set = self.__dict__.get('_result_set')
+        if result_set is None or name not in self._unloaded:
+            return None
+
+        # Members whose attribute was assigned since the read keep the assigned value.
+        pending = {obj.id: obj for obj in result_set.members()
+                   if name in obj._unloaded and name not in obj.__dict__}
+        ids = list(pending)
+        conn = self._connect(readonly=True)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for start in range(0, len(ids), _LAZY_LOAD_CHUNK):
+                chunk = ids[start:start + _LAZY_LOAD_CHUNK]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                sql = f"SELECT id, {name} FROM {result_set.table} WHERE id IN ({placeholders})"
+                cursor.execute(sql, chunk)
+                for row in cursor.fetchall():
+                    obj = pending[row['id']]
+                    if name in obj._unloaded:
+                        obj.__dict__[name] = self._from_db({name: row[name]})[name]
+                        obj._unloaded.discard(name)
+        except Exception as e:
+            print(f"Deferred load failed: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+        return self.__dict__.get(name)
 
 
     @classmethod
     def get(cls, table, id):
         # Retrieve a record from the database by its ID.
-        conn = cls()._db.connect()
+        return cls._get(table, id, cls._default_columns)
+
+    @classmethod
+    def _get(cls, table, id, columns):
+        conn = cls._connect(readonly=True)
         cursor = conn.cursor(dictionary=True)
         try:
-            sql = f"SELECT * FROM {table} WHERE id = %s"
+            sql = f"SELECT {_column_list(columns)} FROM {table} WHERE id = %s"
             cursor.execute(sql, (id,))
             result = cursor.fetchone()
-            return result
+            if result is None:
+                return None
+            return cls._hydrate(table, [result])[0]
         except Exception as e:
             print(f"Get failed: {e}")
         finally:
@@ -147,7 +611,7 @@ class Base:
     def delete(cls, table, id):
         # Delete a record from the database by its ID.
 
-        conn = cls()._db.connect()
+        conn = cls._connect()
         cursor = conn.cursor()
         try:
             sql = f"DELETE FROM {table} WHERE id = %s"
@@ -164,16 +628,19 @@ class Base:
     @classmethod
     def get_all(cls, table=None):
         # Retrieve all records of this model from the database.
+        return cls._get_all(table, cls._default_columns)
 
-        conn = cls()._db.connect()
+    @classmethod
+    def _get_all(cls, table, columns, order_by=()):
+        conn = cls._connect(readonly=True)
         cursor = conn.cursor(dictionary=True)
         try:
             if table is None:
-                table = cls.__name__.lower()
-            sql = f"SELECT * FROM {table}"
+                table = cls._table
+            sql = f"SELECT {_column_list(columns, order_by)} FROM {table}{_order_clause(order_by)}"
             cursor.execute(sql)
             results = cursor.fetchall()
-            return results
+            return cls._hydrate(table, results)
         except Exception as e:
             print(f"Get all failed: {e}")
         finally:
@@ -184,30 +651,302 @@ class Base:
     @classmethod
     def query(cls, **filters):
         # Query records based on filters.
+        return cls._query(filters, cls._default_columns)
 
-        conn = cls()._db.connect()
+    @classmethod
+    def _query(cls, filters, columns, order_by=()):
+        # With the shard key among the filters only the owning shard is read.
+        conn = cls._connect(readonly=True, shard_value=filters.get(cls.shard_key, ALL_SHARDS))
         cursor = conn.cursor(dictionary=True)
         try:
-            table = cls.__name__.lower()
-            conditions = " AND ".join([f"{k} = %s" for k in filters])
-            values = tuple(filters.values())
-            sql = f"SELECT * FROM {table} WHERE {conditions}"
+            table = cls._table
+            sql, values = cls._query_sql(filters, columns, order_by)
             cursor.execute(sql, values)
             results = cursor.fetchall()
-            return results
+            return cls._hydrate(table, results)
         except Exception as e:
             print(f"Query failed: {e}")
         finally:
             cursor.close()
             conn.close()
 
+
+    @classmethod
+    def _query_sql(cls, filters, columns, order_by=()):
+        # Build the SELECT used by query(); no WHERE clause when there are no filters.
+        table = cls._table
+        sql = f"SELECT {_column_list(columns, order_by)} FROM {table}"
+        if filters:
+            sql += " WHERE " + " AND ".join([f"{k} = %s" for k in filters])
+        return sql + _order_clause(order_by), tuple(filters.values())
+
+
+    @classmethod
+    def _async_pool(cls):
+        # Return the AsyncPool for this model's connector on the running event loop.
+        # asyncio is only imported by processes that use the async API.
+        import asyncio
+        from .aio import AsyncPool
+
+        pools = _async_pools.setdefault(asyncio.get_running_loop(), {})
+        backend = cls._backend()
+        pool = pools.get(backend)
+        if pool is None:
+            pool = AsyncPool(backend, max_size=cls.async_pool_size)
+            pools[backend] = pool
+        return pool
+
+    @classmethod
+    async def aget(cls, table, id):
+        # Async counterpart of get().
+        return await cls._async_pool().run(cls.get, table, id, readonly=True)
+
+    @classmethod
+    async def aget_all(cls, table=None):
+        # Async counterpart of get_all().
+        return await cls._async_pool().run(cls.get_all, table, readonly=True)
+
+    @classmethod
+    async def aquery(cls, **filters):
+        # Async counterpart of query().
+        return await cls._async_pool().run(functools.partial(cls.query, **filters), readonly=True)
+
+    async def asave(self):
+        # Async counterpart of save().
+        await self._async_pool().run(self.save)
+
+    @classmethod
+    async def abulk_save(cls, objects):
+        # Async counterpart of bulk_save().
+        await cls._async_pool().run(cls.bulk_save, list(objects))
+
+    @classmethod
+    async def astream(cls, chunk_size=500, **filters):
+        # Iterate over query() results without loading them all at once; rows are fetched
+        # `chunk_size` at a time on one pooled connection:
+        #
+        #   async for rental in Rental.astream(customer_id=1):
+        #       ...
+        table = cls._table
+        if cls._is_sharded(cls._backend()):
+            # Scatter-gather reads need a connection per shard; fall back to one async query.
+            for obj in await cls.aquery(**filters):
+                yield obj
+            return
+        sql, values = cls._query_sql(filters, cls._default_columns)
+        async for rows in cls._async_pool().stream(sql, values, chunk_size):
+            for obj in cls._hydrate(table, rows):
+                yield obj
+
+
+    @classmethod
+    def aggregate(cls, function, column='*', **filters):
+        # Compute COUNT, SUM, MIN, MAX or AVG over this model's table, e.g.
+        # Rental.aggregate('SUM', 'total_price', customer_id=1). On a sharded model every
+        # shard computes its part and the parts are combined here.
+        function = function.upper()
+        if function not in _AGGREGATES:
+            raise ValueError(f"Unsupported aggregate: {function}")
+        conn = cls._connect(readonly=True, shard_value=filters.get(cls.shard_key, ALL_SHARDS))
+        cursor = conn.cursor()
+        try:
+            table = cls._table
+            if function == 'AVG':
+                select = f"SUM({column}), COUNT({column})"
+            else:
+                select = f"{function}({column})"
+            sql = f"SELECT {select} FROM {table}"
+            if filters:
+                sql += " WHERE " + " AND ".join([f"{k} = %s" for k in filters])
+            cursor.execute(sql, tuple(filters.values()))
+            parts = cursor.fetchall()  # one row per shard that was read
+
+            if function == 'AVG':
+                total = sum(row[0] for row in parts if row[0] is not None)
+                count = sum(row[1] for row in parts)
+                return total / count if count else None
+            values = [row[0] for row in parts if row[0] is not None]
+            if function in ('COUNT', 'SUM'):
+                return sum(values) if values or function == 'COUNT' else None
+            if not values:
+                return None
+            return min(values) if function == 'MIN' else max(values)
+        except Exception as e:
+            print(f"Aggregate failed: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
+    @classmethod
+    def count(cls, **filters):
+        # Count the rows matching the filters (all rows without filters).
+        return cls.aggregate('COUNT', **filters)
+
+
+    @classmethod
+    def parallel_scan(cls, workers=4, partition_by='id', chunk_size=1000, ordered=False,
+                      columnar=False, partitions=None, max_queued_chunks=None):
+        # Read the whole table over several connections at once, e.g. for backups and ETL:
+        #
+        #   for chunk in Rental.parallel_scan(workers=8, columnar=True):
+        #       write_backup(chunk)
+        #
+        # The key range of `partition_by` (an integer column) is split into contiguous
+        # ranges. Each worker thread keeps one connection and streams its ranges with
+        # fetchmany(chunk_size) into a bounded queue, so at most `max_queued_chunks` chunks
+        # are held in memory. Yields model instances, or with `columnar=True` one
+        # {column: [values]} dict per chunk. With `ordered=True` the output follows the
+        # global key order: ranges are handed out in order and drained one after another.
+        #
+        # A sharded model is scanned range by range on every shard, over direct shard
+        # connections (`connect_shard()`), so the workers never wait for threads of the
+        # ShardedDatabase scatter-gather pool. In ordered mode the shards' parts of a range
+        # are merged by key, which needs every part in flight at once: the scan then uses at
+        # least one worker per shard.
+        if workers < 1:
+            raise ValueError("parallel_scan() needs at least one worker")
+        table = cls._table
+        low, high = cls._key_bounds(table, partition_by)
+        if low is None:
+            return
+        ranges = _split_range(low, high, partitions or workers * 4)
+        db = cls._backend()
+        targets = list(range(len(db.shards))) if cls._is_sharded(db) else [None]
+        if ordered:
+            workers = max(workers, len(targets))
+        workers = min(workers, len(ranges) * len(targets))
+        max_queued = max_queued_chunks or workers * 2
+
+        columns = cls._default_columns
+        if columns is not None and partition_by not in columns:
+            columns = columns + [partition_by]
+        sql = f"SELECT {_column_list(columns)} FROM {table} WHERE {partition_by} >= %s AND {partition_by} <= %s"
+        if ordered:
+            sql += f" ORDER BY {partition_by}"
+
+        # One task per (range, shard); shard None is the model's own connection.
+        pending = queue.Queue()
+        for index, bounds in enumerate(ranges):
+            for target in targets:
+                pending.put((index, target, bounds))
+        if ordered:
+            size = max(1, max_queued // workers)
+            outputs = {(index, target): queue.Queue(size) for index in range(len(ranges)) for target in targets}
+        else:
+            output_all = queue.Queue(max_queued)
+        stop = threading.Event()
+        failures = []
+
+        def connect(target):
+            if target is None:
+                return cls._connect(readonly=True)
+            return db.connect_shard(target, readonly=True)
+
+        def work():
+            connections = {}
+            try:
+                while not stop.is_set():
+                    try:
+                        index, target, (start, end) = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    conn = connections.get(target)
+                    if conn is None:
+                        conn = connections[target] = connect(target)
+                    output = outputs[index, target] if ordered else output_all
+                    cursor = conn.cursor(dictionary=True)
+                    try:
+                        cursor.execute(sql, (start, end))
+                        while True:
+                            rows = cursor.fetchmany(chunk_size)
+                            if not rows or not put_until_stopped(output, (_CHUNK, rows), stop):
+                                break
+                    finally:
+                        cursor.close()
+                    if ordered:
+                        put_until_stopped(output, (_DONE, None), stop)
+            except Exception as e:
+                failures.append(e)
+            finally:
+                for conn in connections.values():
+                    conn.close()
+                if not ordered:
+                    put_until_stopped(output_all, (_DONE, None), stop)
+
+        threads = [threading.Thread(target=work, daemon=True, name=f"orm-scan-{i}") for i in range(workers)]
+        for thread in threads:
+            thread.start()
+
+        def drain(output, done_markers):
+            # Yield chunks from one queue until it has delivered `done_markers` _DONE messages.
+            while done_markers:
+                if failures:
+                    raise failures[0]
+                try:
+                    kind, rows = output.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if kind == _DONE:
+                    done_markers -= 1
+                else:
+                    yield rows
+            # A failing worker still sends _DONE, which may be the last marker.
+            if failures:
+                raise failures[0]
+
+        def ordered_chunks():
+            # Yield the chunks of each range in turn, merging the shards' parts of a range.
+            for index in range(len(ranges)):
+                parts = [drain(outputs[index, target], 1) for target in targets]
+                if len(parts) == 1:
+                    yield from parts[0]
+                    continue
+                rows = heapq.merge(*(itertools.chain.from_iterable(part) for part in parts),
+                                   key=lambda row: row[partition_by])
+                while True:
+                    chunk = list(itertools.islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    yield chunk
+
+        try:
+            if ordered:
+                chunks = ordered_chunks()
+            else:
+                chunks = drain(output_all, workers)
+            for rows in chunks:
+                if columnar:
+                    rows = [cls._from_db(row) for row in rows]
+                    yield {name: [row[name] for row in rows] for name in rows[0]}
+                else:
+                    yield from cls._hydrate(table, rows)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    @classmethod
+    def _key_bounds(cls, table, column):
+        # Return (MIN, MAX) of a column, across every shard for a sharded model.
+        conn = cls._connect(readonly=True)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT MIN({column}), MAX({column}) FROM {table}")
+            rows = [row for row in cursor.fetchall() if row[0] is not None]
+            if not rows:
+                return None, None
+            return min(row[0] for row in rows), max(row[1] for row in rows)
+        finally:
+            cursor.close()
+            conn.close()
+
        
 
     @classmethod
     def create_table(cls, table_name, schema=None):
         # Create a table for an existing schema.
 
-        conn = cls()._db.connect()
+        conn = cls._connect()
         cursor = conn.cursor()
         try:
             sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({schema})"
@@ -225,7 +964,7 @@ class Base:
     def create_schema(cls, descriptor=None):
         # Generate the schema for the model in the database.
 
-        conn = cls()._db.connect()
+        conn = cls._connect()
         cursor = conn.cursor()
         try:
             sql = f"CREATE SCHEMA IF NOT EXISTS {descriptor}"
@@ -243,7 +982,7 @@ class Base:
     def join(cls, models):
         #Join multiple models to organize your data.
 
-        conn = cls()._db.connect()
+        conn = cls._connect(readonly=True)
         cursor = conn.cursor(dictionary=True)
         try:
             join_query = " JOIN ".join(models)
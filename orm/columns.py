@@ -15,6 +15,8 @@
 #   - `nullable`: Whether the column can be null.
 #   - `unique`: Whether the column values must be unique.
 #   - `foreign_key`: The foreign key constraint that relates to another table.
+#   - `deferred`: Leave the column out of the model's default SELECT (e.g. wide TEXT or BLOB
+#     columns); it is loaded lazily the first time the attribute is read.
 #
 # Students need to implement the following methods to complete the functionality of this class:
 #   - `get_sql()`: Generates the SQL representation of the column.
@@ -23,6 +25,7 @@
 #   - `to_dict()`: Returns the column's configuration as a dictionary.
 #   - `get_constraints()`: Generates a string of the column's constraints (e.g., "NOT NULL").
 #   - `is_foreign_key()`: Checks if the column is a foreign key.
+#   - `codec()`: Returns the compiled value codec for the column (see `datatypes.py`).
 #
 # Example usage in the ORM base class:
 #
@@ -32,15 +35,18 @@
 #       email = Column(String(100), unique=True)  # String column, with a unique constraint
 #       created_at = Column(Date)  # Date column
 #       profile_id = Column(Integer, foreign_key='Profile(id)')  # Foreign key referencing 'Profile' table
+#       avatar = Column(Blob, deferred=True)  # Only fetched when `user.avatar` is read
 #
 #   The ORM will use these `Column` instances to define the table schema and generate the
 #   corresponding SQL for table creation, validation, and foreign key enforcement.
 
+from .datatypes import Codec
+
 
 class Column:
 
     # Initialize a Column instance with type and optional constraints.
-    def __init__(self, column_type, primary_key=False, nullable=True, unique=False, foreign_key=None, default=True, on_delete=None, on_update=None):
+    def __init__(self, column_type, primary_key=False, nullable=True, unique=False, foreign_key=None, default=True, on_delete=None, on_update=None, deferred=False):
         self.type = column_type
         self.primary_key = primary_key
         self.nullable = nullable
@@ -49,6 +55,23 @@ class Column:
         self.on_update = on_update
         self.on_delete = on_delete
         self.default = default
+        self.deferred = deferred
+        self.name = None
+        self._codec = None
+
+    # Record the attribute name this column is assigned to on the model class.
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    # Reading a column that is not set on an instance: load it if it was deferred, else None.
+    # Values that are set live in the instance `__dict__` and never reach this method.
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        load = getattr(instance, '_load_deferred', None)
+        if load is None:
+            return None
+        return load(self.name)
     
     # Return the full SQL definition of this column based on its constraints.
     def get_sql(self):
@@ -95,7 +118,8 @@ class Column:
             "foreign_key": self.foreign_key,
             "default": self.default,
             "on_delete": self.on_delete,
-            "on_update": self.on_update
+            "on_update": self.on_update,
+            "deferred": self.deferred
         }
     
     # Return all SQL constraints for this column as a string
@@ -119,4 +143,15 @@ class Column:
     
     # Return True if this column is a foreign key.
     def is_foreign_key(self):
-        return self.foreign_key is not None
\ No newline at end of file
+        return self.foreign_key is not None
+
+    # Return the compiled codec (conversion + validation) for this column, built on first use.
+    def codec(self):
+        if self._codec is None:
+            column_type = self.type() if isinstance(self.type, type) else self.type
+            compile_codec = getattr(column_type, 'compile', None)
+            if compile_codec is not None:
+                self._codec = compile_codec(self)
+            else:  # plain SQL type strings such as "INT" are passed through unchecked
+                self._codec = Codec(self.name, True, lambda value: None)
+        return self._codec
@@ -27,8 +27,104 @@
 #   This would represent a "User" table with columns: "id", "name", "is_active", and "created_at".
 #   The ORM will use the data types (Integer, String, Boolean, Date) to validate values and generate
 #   SQL queries when interacting with the database.
+#
+# Value codecs:
+#   Each type also compiles into a `Codec` for a given `Column` (see `compile()`). A codec converts
+#   values between Python and the database and validates them (type, NULL, string length, integer
+#   range) without a round trip. Codecs are built once per model (`Base._codecs()`), and bulk
+#   paths validate a whole batch column by column with `Codec.validate_many()`, which uses NumPy
+#   for large batches when it is installed.
+#
+#   codec = Customer._codecs()["phone"]        # Column(String(15))
+#   codec.validate("+91 98765 43210 ext 7")     # -> "phone is 21 characters, longer than VARCHAR(15)"
+#   codec.validate_many(["9999999999", 42])     # -> [(1, "phone expects a string, got int")]
+
+import datetime
+import math
+from decimal import Decimal
+
+# NumPy is optional (batches are then validated value by value) and is only imported by the
+# first batch large enough to use it, so importing the ORM stays cheap.
+np = None
+_numpy_checked = False
+
+
+def _numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+        _numpy_checked = True
+    return np
+
+
+# Batches smaller than this are validated value by value; NumPy only pays off on larger ones.
+VECTORIZE_MIN_ROWS = 256
+
+
+class ValidationError(ValueError):
+    # Raised when one or more values fail their column codec, before any SQL is sent.
+    def __init__(self, model, errors):
+        self.model = model
+        self.errors = errors  # [(row index, message)]
+        shown = "; ".join(f"row {i}: {message}" for i, message in errors[:5])
+        more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ""
+        super().__init__(f"{model}: {len(errors)} invalid value(s): {shown}{more}")
+
+
+def _identity(value):
+    return value
+
+
+class Codec:
+    # Compiled conversion and validation for one column.
+    #   - `check(value)` returns an error message or None, for a non-NULL value.
+    #   - `vector_check(values)` returns the positions of bad values in a list of non-NULL
+    #     values using NumPy, or None when the batch cannot be vectorized.
+    def __init__(self, name, nullable, check, to_db=None, from_db=None, vector_check=None):
+        self.name = name
+        self.nullable = nullable
+        self.check = check
+        self.to_db = to_db or _identity
+        self.from_db = from_db or _identity
+        self.vector_check = vector_check
+
+    def validate(self, value):
+        """Return an error message for a bad value, or None if it is valid."""
+        if value is None:
+            return None if self.nullable else f"{self.name} cannot be NULL"
+        return self.check(value)
+
+    def validate_many(self, values):
+        """Return [(position, message)] for every bad value in a batch."""
+        errors = []
+        present = []
+        for i, value in enumerate(values):
+            if value is not None:
+                present.append(i)
+            elif not self.nullable:
+                errors.append((i, f"{self.name} cannot be NULL"))
+
+        bad = None
+        if self.vector_check is not None and len(present) >= VECTORIZE_MIN_ROWS and _numpy() is not None:
+            bad = self.vector_check([values[i] for i in present])
+        if bad is None:
+            for i in present:
+                message = self.check(values[i])
+                if message:
+                    errors.append((i, message))
+        else:
+            errors.extend((present[j], self.check(values[present[j]])) for j in bad)
+        return sorted(errors)
+
 
 class Integer:
+    # Signed range of each integer type, in bits.
+    BITS = {"TINYINT": 8, "SMALLINT": 16, "INT": 32, "INTEGER": 32, "BIGINT": 64}
+
     def __init__(self, type="INTEGER"):
         self.type = type
 
@@ -39,9 +135,33 @@ class Integer:
     def get_sql(self):
         return self.type.upper()
 
+    def compile(self, column):
+        """Build the codec for an integer column: type and range checks."""
+        sql_type = self.get_sql()
+        bits = self.BITS.get(sql_type, 32)
+        low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+        name = column.name
+
+        def check(value):
+            if not isinstance(value, int):
+                return f"{name} expects an integer, got {type(value).__name__}"
+            if not low <= value <= high:
+                return f"{name} value {value} is out of range for {sql_type}"
+            return None
+
+        def vector_check(values):
+            array = np.asarray(values)
+            if array.dtype.kind not in "iub":  # mixed types or ints wider than 64 bits
+                return None
+            return np.flatnonzero((array < low) | (array > high)).tolist()
+
+        return Codec(name, column.nullable or column.primary_key, check, vector_check=vector_check)
+
 
 class String:
     def __init__(self, type='TEXT', length=None):
+        if isinstance(type, int):  # String(255) is shorthand for VARCHAR(255)
+            type, length = 'VARCHAR', type
         self.type = type
         self.length = length
 
@@ -57,6 +177,23 @@ class String:
             return f"{self.type.upper()}({self.length})"
         return self.type.upper()
 
+    def compile(self, column):
+        """Build the codec for a string column: type and length checks."""
+        sql_type = self.get_sql()
+        length = self.length
+        name = column.name
+
+        def check(value):
+            if not isinstance(value, str):
+                return f"{name} expects a string, got {type(value).__name__}"
+            if length is not None and len(value) > length:
+                return f"{name} is {len(value)} characters, longer than {sql_type}"
+            return None
+
+        # No NumPy path: len() per value is as fast, and a fixed-width string array costs rows x
+        # longest string x 4 bytes (and drops trailing NULs).
+        return Codec(name, column.nullable or column.primary_key, check)
+
 
 class Float:
     def __init__(self, type='FLOAT'):
@@ -70,6 +207,26 @@ class Float:
         """Return the SQL representation of this float type."""
         return self.type.upper()
 
+    def compile(self, column):
+        """Build the codec for a numeric column: rejects non-numbers, NaN and infinity."""
+        name = column.name
+
+        def check(value):
+            if not isinstance(value, (int, float, Decimal)):
+                return f"{name} expects a number, got {type(value).__name__}"
+            finite = value.is_finite() if isinstance(value, Decimal) else math.isfinite(value)
+            if not finite:  # Decimal.is_finite() also handles sNaN, which math.isfinite() rejects
+                return f"{name} cannot store {value}"
+            return None
+
+        def vector_check(values):
+            array = np.asarray(values)
+            if array.dtype.kind not in "iubf":
+                return None
+            return np.flatnonzero(~np.isfinite(array.astype(float))).tolist()
+
+        return Codec(name, column.nullable or column.primary_key, check, vector_check=vector_check)
+
 
 class Boolean:
     def __init__(self):
@@ -83,6 +240,17 @@ class Boolean:
         """Return the SQL BOOLEAN type."""
         return self.type.upper()
 
+    def compile(self, column):
+        """Build the codec for a boolean column; MySQL stores and returns it as 0/1."""
+        name = column.name
+
+        def check(value):
+            if not isinstance(value, int) or value not in (0, 1):
+                return f"{name} expects True or False, got {value!r}"
+            return None
+
+        return Codec(name, column.nullable or column.primary_key, check, to_db=int, from_db=bool)
+
 
 class Date:
     def __init__(self, type='DATE'):
@@ -96,6 +264,25 @@ class Date:
         """Return the SQL representation of this date type."""
         return self.type.upper()
 
+    def compile(self, column):
+        """Build the codec for a date column: accepts date/datetime objects or ISO strings."""
+        sql_type = self.get_sql()
+        parse = datetime.date.fromisoformat if sql_type == "DATE" else datetime.datetime.fromisoformat
+        name = column.name
+
+        def check(value):
+            if isinstance(value, datetime.date):
+                return None
+            if not isinstance(value, str):
+                return f"{name} expects a date, got {type(value).__name__}"
+            try:
+                parse(value)
+            except ValueError:
+                return f"{name} value {value!r} is not a valid {sql_type}"
+            return None
+
+        return Codec(name, column.nullable or column.primary_key, check)
+
 
 class Blob:
     def __init__(self):
@@ -108,3 +295,14 @@ class Blob:
     def get_sql(self):
         """Return the SQL BLOB type."""
         return self.type.upper()
+
+    def compile(self, column):
+        """Build the codec for a binary column: accepts bytes-like values."""
+        name = column.name
+
+        def check(value):
+            if not isinstance(value, (bytes, bytearray, memoryview)):
+                return f"{name} expects bytes, got {type(value).__name__}"
+            return None
+
+        return Codec(name, column.nullable or column.primary_key, check, to_db=bytes)
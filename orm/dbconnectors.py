@@ -1,4 +1,9 @@
-import mysql.connector
+import itertools
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 # This module provides a basic MySQL connector to establish a connection and get a cursor.
 # It is designed to be used as the database backend for the ORM project.
@@ -17,8 +22,41 @@ import mysql.connector
 # database connectors (e.g., PostgreSQL, SQLite) can be added in the future with minimal changes.
 # Students do NOT need to implement support for other databases for this project.
 # They may use the MySQL connector provided here as-is.
+#
+# Read/write splitting:
+#     `ReplicatedDatabase` wraps one primary connector and any number of replica connectors.
+#     The ORM asks for `connect(readonly=True)` on its read paths (`get`, `get_all`, `query`,
+#     `join`), which is routed to a healthy replica; everything else goes to the primary.
+#     `SQLite` has the same interface, so several SQLite files can stand in for a cluster:
+#
+#     from orm.base import Base
+#     Base.use(ReplicatedDatabase(SQLite("primary.db"), [SQLite("r1.db"), SQLite("r2.db")]))
+#
+#     with Base.transaction():      # every statement pinned to one primary connection
+#         ...
+
 
 class MySQL:
+    @staticmethod
+    def connect(readonly=False):
+        """
+        Establishes and returns a connection to a MySQL database.
+
+        This is what the ORM base class uses; callers create their own cursors.
+        `readonly` is a routing hint for ReplicatedDatabase and is ignored here.
+
+        Raises:
+            mysql.connector.Error: If there is an error during connection
+        """
+        import mysql.connector  # imported on first connect, not when the ORM is imported
+
+        return mysql.connector.connect(
+            host="localhost",         # Host where the MySQL server is running
+            user="root",              # Username for the database
+            password="password",      # Password for the user
+            database="your_database"  # Name of the database to connect to
+        )
+
     @staticmethod
     def get_db_connection():
         """
@@ -32,13 +70,328 @@ class MySQL:
         Raises:
             mysql.connector.Error: If there is an error during connection
         """
-        connection = mysql.connector.connect(
-            host="localhost",         # Host where the MySQL server is running
-            user="root",              # Username for the database
-            password="password",      # Password for the user
-            database="your_database"  # Name of the database to connect to
-        )
+        connection = MySQL.connect()
         cursor = connection.cursor()
         return connection, cursor
 
 
+class SQLite:
+    def __init__(self, path):
+        """
+        A SQLite connector with the same interface as MySQL, for local development and tests.
+
+        Args:
+            path: database file (or ":memory:", which gives every connection its own database)
+        """
+        self.path = path
+
+    def connect(self, readonly=False):
+        """Return a connection that accepts `%s` placeholders and `cursor(dictionary=True)`."""
+        import sqlite3  # imported on first connect, like mysql.connector
+
+        return _SQLiteConnection(sqlite3.connect(self.path, timeout=30, check_same_thread=False))
+
+    def get_db_connection(self):
+        """Return (connection, cursor), like MySQL.get_db_connection()."""
+        connection = self.connect()
+        return connection, connection.cursor()
+
+
+class _SQLiteConnection:
+    # sqlite3 connection whose cursors behave like mysql.connector cursors.
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, dictionary=False):
+        cursor = self._connection.cursor()
+        if dictionary:
+            cursor.row_factory = lambda cur, row: {d[0]: v for d, v in zip(cur.description, row)}
+        return _SQLiteCursor(cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class _SQLiteCursor:
+    # sqlite3 cursor that accepts the MySQL-style `%s` placeholders used throughout the ORM.
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace("%s", "?"), tuple(params))
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql.replace("%s", "?"), [tuple(params) for params in seq_of_params])
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# Connection every ORM call should use in the current thread or asyncio task, set by
+# `transaction()` or `bound_connection()` (the async pool in `aio.py` uses the latter).
+_pinned = ContextVar("orm_pinned_connection", default=None)
+
+# Read-your-writes state of the current session (thread or asyncio task, or a `session()` block).
+_session = ContextVar("orm_session", default=None)
+
+
+class _PinnedConnection:
+    # The connection of an open transaction. The ORM methods that run inside it still call
+    # commit()/close()/rollback(); those are deferred to the end of the transaction.
+    def __init__(self, connection):
+        self._connection = connection
+        self.failed = False
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        self.failed = True
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def pinned_connection():
+    """Return the connection bound in this context, or None."""
+    return _pinned.get()
+
+
+@contextmanager
+def bound_connection(connection):
+    """Make every ORM call in the block use `connection` instead of opening its own."""
+    token = _pinned.set(connection)
+    try:
+        yield connection
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def transaction(connector):
+    """
+    Pin every ORM operation in the block to one connection (the primary, for a
+    ReplicatedDatabase) and commit them together. A nested block joins the outer one.
+
+    Raises:
+        RuntimeError: If a statement inside the block failed; everything is rolled back.
+    """
+    if _pinned.get() is not None:
+        yield _pinned.get()
+        return
+
+    conn = connector.connect()
+    pinned = _PinnedConnection(conn)
+    try:
+        with bound_connection(pinned):
+            yield pinned
+        if pinned.failed:
+            raise RuntimeError("Transaction rolled back: a statement inside it failed")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+class _SessionState:
+    def __init__(self):
+        self.last_write = float("-inf")
+
+
+def _current_session():
+    state = _session.get()
+    if state is None:
+        state = _SessionState()
+        _session.set(state)
+    return state
+
+
+@contextmanager
+def session():
+    """Start a fresh read-your-writes session, e.g. one per web request."""
+    token = _session.set(_SessionState())
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+class _TrackedConnection:
+    # A connection that reports back to ReplicatedDatabase when it is closed.
+    def __init__(self, connection, on_close):
+        self._connection = connection
+        self._on_close = on_close
+
+    def close(self):
+        try:
+            self._connection.close()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class _Replica:
+    def __init__(self, connector):
+        self.connector = connector
+        self.busy = 0           # connections currently open
+        self.failures = 0       # consecutive failed connects / health checks
+        self.ejected_until = 0.0
+
+
+class ReplicatedDatabase:
+    def __init__(self, primary, replicas, policy="round_robin", read_your_writes=2.0,
+                 health_interval=5.0, max_failures=3, eject_seconds=30.0):
+        """
+        Routes ORM traffic between one primary and any number of read replicas.
+
+        Args:
+            primary: connector that receives writes, transactions and fallback reads
+            replicas: list of connectors that serve reads
+            policy: "round_robin" or "least_busy" (fewest open connections)
+            read_your_writes: seconds after a write during which the same session keeps
+                reading from the primary, so it never sees data older than its own writes
+            health_interval: seconds between `SELECT 1` probes of the replicas, run on a
+                background thread so reads never wait on them (None disables the probes)
+            max_failures: consecutive failures after which a replica is ejected
+            eject_seconds: how long an ejected replica is skipped before it is tried again
+        """
+        if policy not in ("round_robin", "least_busy"):
+            raise ValueError(f"Unknown replica policy: {policy}")
+        self.primary = primary
+        self.replicas = [_Replica(connector) for connector in replicas]
+        self.policy = policy
+        self.read_your_writes = read_your_writes
+        self.health_interval = health_interval
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._stop_monitor = threading.Event()
+
+    def connect(self, readonly=False):
+        """Return a replica connection for reads, or a primary connection for everything else."""
+        self._start_monitor()
+        session_state = _current_session()
+        if not readonly:
+            session_state.last_write = time.monotonic()
+            return _TrackedConnection(self.primary.connect(), lambda: self._mark_write(session_state))
+        if self.reads_from_primary():
+            return self.primary.connect()
+
+        for replica in self._candidates():
+            try:
+                conn = replica.connector.connect()
+            except Exception as e:
+                self._record_failure(replica, e)
+                continue
+            self._record_success(replica)
+            with self._lock:
+                replica.busy += 1
+            return _TrackedConnection(conn, lambda replica=replica: self._release(replica))
+        return self.primary.connect()  # no healthy replica: the primary serves the read
+
+    def note_write(self):
+        """Record a write by the current session, starting its read-your-writes window."""
+        _current_session().last_write = time.monotonic()
+
+    def reads_from_primary(self):
+        """Return True while the current session is inside its read-your-writes window."""
+        return time.monotonic() - _current_session().last_write < self.read_your_writes
+
+    def check_health(self):
+        """Probe every replica with `SELECT 1`, ejecting or re-admitting it. Returns [healthy, ...]."""
+        results = []
+        for replica in self.replicas:
+            try:
+                conn = replica.connector.connect()
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+                    cursor.close()
+                finally:
+                    conn.close()
+            except Exception as e:
+                self._record_failure(replica, e)
+                results.append(False)
+            else:
+                self._record_success(replica)
+                results.append(True)
+        return results
+
+    def close(self):
+        """Stop the background health probes."""
+        self._stop_monitor.set()
+
+    def _start_monitor(self):
+        # Start the health probe thread on first use. It holds only a weak reference, so an
+        # unused ReplicatedDatabase can still be garbage collected (which ends the thread).
+        if self._monitor is not None or not self.health_interval or not self.replicas:
+            return
+        with self._lock:
+            if self._monitor is not None:
+                return
+            self._monitor = threading.Thread(
+                target=_monitor_health,
+                args=(weakref.ref(self), self._stop_monitor, self.health_interval),
+                daemon=True,
+                name="orm-replica-health",
+            )
+        self._monitor.start()
+
+    def _candidates(self):
+        # Healthy replicas in the order they should be tried.
+        now = time.monotonic()
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.ejected_until <= now]
+            if not healthy:
+                return []
+            if self.policy == "least_busy":
+                return sorted(healthy, key=lambda replica: replica.busy)
+            start = next(self._counter) % len(healthy)
+            return healthy[start:] + healthy[:start]
+
+    def _record_failure(self, replica, error):
+        with self._lock:
+            replica.failures += 1
+            if replica.failures >= self.max_failures and replica.ejected_until <= time.monotonic():
+                replica.ejected_until = time.monotonic() + self.eject_seconds
+                print(f"Replica {self.replicas.index(replica)} ejected: {error}")
+
+    def _record_success(self, replica):
+        with self._lock:
+            replica.failures = 0
+            replica.ejected_until = 0.0
+
+    def _release(self, replica):
+        with self._lock:
+            replica.busy -= 1
+
+    def _mark_write(self, session_state):
+        session_state.last_write = time.monotonic()
+
+
+def _monitor_health(database_ref, stop, interval):
+    # Probe the replicas of a ReplicatedDatabase every `interval` seconds until it is closed.
+    while not stop.wait(interval):
+        database = database_ref()
+        if database is None:
+            return
+        try:
+            database.check_health()
+        except Exception as e:
+            print(f"Replica health check failed: {e}")
+        del database
@@ -0,0 +1,454 @@
+# explain.py
+#
+# This file defines optional EXPLAIN capture for the statements the ORM issues. When it is
+# enabled, every connection handed out by `Base._connect()` (`get()`, `get_all()`, `query()`,
+# `join()`, `save()`, `delete()`, `aggregate()`, deferred loads, ...) is watched:
+#
+#   - Statements are grouped into shapes: the SQL with literals and IN-lists normalized, so
+#     `query(customer_id=1)` and `query(customer_id=2)` are the same shape.
+#   - The first time a SELECT, UPDATE or DELETE shape is seen, EXPLAIN runs once on the same
+#     connection, before the statement itself, and its plan is cached for the process.
+#   - Every execution adds to the shape's call count and observed time (execute + fetch). An
+#     executemany() batch (e.g. from `bulk_save()`) counts as one call, with one row per
+#     parameter set.
+#   - Plans are checked for full table scans, filesorts and temporary tables. Findings on
+#     tables smaller than `min_rows` are ignored, since scanning a small table is cheap.
+#   - For a flagged shape on a model table, a composite index is suggested from the model's
+#     `Column` metadata: equality columns first (unique, then foreign key, then the rest, with
+#     booleans last), then ORDER BY columns, then range columns.
+#
+# MySQL plans come from `EXPLAIN` (type=ALL, "Using filesort", "Using temporary"); SQLite plans
+# from `EXPLAIN QUERY PLAN` (SCAN without an index, "USE TEMP B-TREE"). A sharded scatter read
+# is explained on the first shard.
+#
+# Example usage:
+#
+#   from orm import explain
+#   explain.enable(min_rows=1000, dump_path="explain.json")   # dumped when the process exits
+#   ...
+#   print(explain.report(limit=10))
+#
+# Report from one or more dumps (e.g. one per worker process), ranked by calls x mean time:
+#
+#   python -m orm.explain explain.json worker2.json --limit 20
+
+import re
+import threading
+import time
+
+from .dbconnectors import _SQLiteConnection
+from .sharding import _ScatterConnection
+
+
+_enabled = False
+_min_rows = 1000
+_shapes = {}          # normalized SQL -> QueryShape
+_table_rows = {}      # table -> row count (SQLite only; MySQL plans carry their own estimate)
+_lock = threading.Lock()
+
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+_SPACES = re.compile(r"\s+")
+
+_EQUALITY = re.compile(r"\b(\w+)\s*(?:=\s*%s|IN\s*\()", re.IGNORECASE)
+_RANGE = re.compile(r"\b(\w+)\s*(?:[<>]=?\s*%s|BETWEEN\b)", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER BY\s+(.+?)(?:\s+LIMIT\b|$)", re.IGNORECASE)
+_WHERE = re.compile(r"\bWHERE\b(.*)$", re.IGNORECASE | re.DOTALL)
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+_SQLITE_TABLE = re.compile(r"^(?:SCAN|SEARCH) (?:TABLE )?(\w+)")
+
+
+class QueryShape:
+
+    # Initialize the statistics of one normalized statement.
+    def __init__(self, sql, model=None):
+        self.sql = sql
+        self.model = model
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.plan = None          # list of plan lines, once explained
+        self.findings = []        # [{"kind": ..., "table": ..., "rows": ...}]
+        self.suggestion = None    # CREATE INDEX statement, if one would help
+        self.error = None         # why EXPLAIN failed, if it did
+        self._explaining = False
+
+    # Add one execution to the shape's statistics.
+    def record(self, seconds, rows):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rows += rows
+
+    # Return the mean observed time of one execution, in seconds.
+    def mean_seconds(self):
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+    # Return the plan findings on tables with at least `min_rows` rows.
+    def flagged(self, min_rows=None):
+        threshold = _min_rows if min_rows is None else min_rows
+        return [f for f in self.findings if f["rows"] is None or f["rows"] >= threshold]
+
+    # Return the shape as a JSON-serializable dictionary (see `dump()`).
+    def to_dict(self):
+        return {
+            "sql": self.sql,
+            "model": self.model,
+            "calls": self.calls,
+            "total_seconds": self.total_seconds,
+            "max_seconds": self.max_seconds,
+            "rows": self.rows,
+            "plan": self.plan,
+            "findings": self.findings,
+            "suggestion": self.suggestion,
+            "error": self.error,
+        }
+
+    # Build a shape from a dictionary written by `to_dict()`.
+    @classmethod
+    def from_dict(cls, data):
+        shape = cls(data["sql"], data.get("model"))
+        for key in ("calls", "total_seconds", "max_seconds", "rows", "plan", "findings",
+                    "suggestion", "error"):
+            setattr(shape, key, data.get(key, getattr(shape, key)))
+        return shape
+
+
+# Start watching ORM statements. `dump_path` writes the collected shapes when the process exits.
+def enable(min_rows=1000, dump_path=None):
+    global _enabled, _min_rows
+    from .base import Base
+
+    _min_rows = min_rows
+    _enabled = True
+    Base._watch_statements = True
+    if dump_path is not None:
+        import atexit
+        atexit.register(dump, dump_path)
+
+
+# Stop watching statements; the shapes collected so far are kept.
+def disable():
+    global _enabled
+    from .base import Base
+
+    _enabled = False
+    Base._watch_statements = False
+
+
+# Return True while statements are being watched.
+def is_enabled():
+    return _enabled
+
+
+# Forget every shape and cached plan, e.g. after adding an index.
+def reset():
+    with _lock:
+        _shapes.clear()
+        _table_rows.clear()
+
+
+# Return the collected shapes.
+def shapes():
+    with _lock:
+        return list(_shapes.values())
+
+
+# Return `sql` with its literal values and IN-lists normalized, so equal shapes compare equal.
+def normalize(sql):
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("%s, ...", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+# Return `conn` wrapped so the statements run on it are recorded (see `Base._connect()`).
+def watch(conn, model):
+    return _WatchedConnection(conn, model)
+
+
+class _WatchedConnection:
+    # A connection whose cursors record their statements. Everything else (commit(), close(),
+    # rollback(), ...) goes straight to the wrapped connection.
+    def __init__(self, connection, model):
+        self._connection = connection
+        self._model = model
+
+    def cursor(self, dictionary=False):
+        return _WatchedCursor(self._connection, self._connection.cursor(dictionary=dictionary), self._model)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class _WatchedCursor:
+    # Times execute() and the fetches that follow it; the execution is recorded once the
+    # cursor runs its next statement or is closed.
+    def __init__(self, connection, cursor, model):
+        self._connection = connection
+        self._cursor = cursor
+        self._model = model
+        self._shape = None
+        self._seconds = 0.0
+        self._rows = 0
+
+    def execute(self, sql, params=()):
+        self._finish()
+        self._shape = _observe(self._connection, self._model, sql, params)
+        self._timed(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        seq_of_params = list(seq_of_params)
+        first = seq_of_params[0] if seq_of_params else ()
+        self._shape = _observe(self._connection, self._model, sql, first)
+        self._timed(self._cursor.executemany, sql, seq_of_params)
+        self._rows += len(seq_of_params)
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        self._rows += row is not None
+        return row
+
+    def fetchmany(self, size=1):
+        rows = self._timed(self._cursor.fetchmany, size)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._rows += len(rows)
+        return rows
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def _timed(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._seconds += time.perf_counter() - start
+
+    def _finish(self):
+        if self._shape is not None:
+            with _lock:
+                self._shape.record(self._seconds, self._rows)
+        self._shape, self._seconds, self._rows = None, 0.0, 0
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# Return the shape of a statement about to run, explaining it first if it is new.
+def _observe(conn, model, sql, params):
+    key = normalize(sql)
+    with _lock:
+        shape = _shapes.get(key)
+        if shape is None:
+            shape = QueryShape(key, model.__name__ if model is not None else None)
+            _shapes[key] = shape
+        explain_now = (shape.plan is None and shape.error is None and not shape._explaining
+                       and key.split(" ", 1)[0].upper() in _EXPLAINABLE)
+        if explain_now:
+            shape._explaining = True
+    if explain_now:
+        try:
+            _explain(shape, conn, model, sql, params)
+        except Exception as e:
+            shape.error = str(e)
+        finally:
+            shape._explaining = False
+    return shape
+
+
+# Run EXPLAIN for a statement and fill in the shape's plan, findings and index suggestion.
+def _explain(shape, conn, model, sql, params):
+    conn, sqlite = _plan_connection(conn)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if sqlite:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            shape.plan, shape.findings = _sqlite_findings(cursor.fetchall(), cursor, model)
+        else:
+            cursor.execute(f"EXPLAIN {sql}", params)
+            shape.plan, shape.findings = _mysql_findings(cursor.fetchall())
+    finally:
+        cursor.close()
+    if model is not None and any(f["table"] == model._table for f in shape.findings):
+        shape.suggestion = suggest_index(sql, model)
+
+
+# Return the connection EXPLAIN should run on, and whether it is SQLite.
+def _plan_connection(conn):
+    if isinstance(conn, _ScatterConnection):
+        conn = conn._connection(conn._indexes[0])
+    raw = conn
+    while not isinstance(raw, _SQLiteConnection):
+        attributes = getattr(raw, "__dict__", {})
+        raw = attributes.get("_connection") or attributes.get("connection")
+        if raw is None:
+            return conn, False
+    return conn, True
+
+
+# Turn MySQL EXPLAIN rows into plan lines and findings.
+def _mysql_findings(rows):
+    plan, findings = [], []
+    for row in rows:
+        table, access, extra = row.get("table"), row.get("type"), row.get("Extra") or ""
+        estimate = row.get("rows")
+        plan.append(f"{table}: type={access} key={row.get('key')} rows={estimate} {extra}".strip())
+        if access == "ALL":
+            findings.append({"kind": "full_scan", "table": table, "rows": estimate})
+        if "Using filesort" in extra:
+            findings.append({"kind": "filesort", "table": table, "rows": estimate})
+        if "Using temporary" in extra:
+            findings.append({"kind": "temporary", "table": table, "rows": estimate})
+    return plan, findings
+
+
+# Turn SQLite EXPLAIN QUERY PLAN rows into plan lines and findings.
+def _sqlite_findings(rows, cursor, model):
+    plan, findings = [], []
+    table = model._table if model is not None else None
+    for row in rows:
+        detail = row["detail"]
+        plan.append(detail)
+        match = _SQLITE_TABLE.match(detail)
+        if match:
+            table = match.group(1)
+        scan = _SQLITE_SCAN.match(detail)
+        if scan and "INDEX" not in scan.group(2) and "PRIMARY KEY" not in scan.group(2):
+            findings.append({"kind": "full_scan", "table": table, "rows": _count_rows(cursor, table)})
+        elif detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+            findings.append({"kind": "filesort", "table": table, "rows": _count_rows(cursor, table)})
+        elif detail.startswith("USE TEMP B-TREE"):
+            findings.append({"kind": "temporary", "table": table, "rows": _count_rows(cursor, table)})
+    return plan, findings
+
+
+# Return the row count of a table, counted once per process.
+def _count_rows(cursor, table):
+    if table is None:
+        return None
+    if table not in _table_rows:
+        cursor.execute(f"SELECT COUNT(*) AS n FROM {table}")
+        _table_rows[table] = cursor.fetchone()["n"]
+    return _table_rows[table]
+
+
+# Return a CREATE INDEX statement serving the predicate and ORDER BY of `sql`, or None.
+def suggest_index(sql, model):
+    if model is None or not model._columns():
+        return None
+    columns = model._columns()
+
+    def indexable(name):
+        column = columns.get(name)
+        if column is None or column.primary_key:
+            return False
+        type_name = getattr(column.type, "__name__", type(column.type).__name__)
+        return type_name != "Blob"
+
+    where = _WHERE.search(sql)
+    predicate = _ORDER_BY.split(where.group(1))[0] if where else ""
+    equality = [name for name in _EQUALITY.findall(predicate) if indexable(name)]
+    ranges = [name for name in _RANGE.findall(predicate) if indexable(name)]
+    order = _ORDER_BY.search(sql)
+    ordering = [part.split()[0] for part in order.group(1).split(",")] if order else []
+    ordering = [name for name in ordering if indexable(name)]
+
+    def rank(name):
+        # Most selective first: unique columns, then foreign keys, then the rest; booleans last.
+        column = columns[name]
+        type_name = getattr(column.type, "__name__", type(column.type).__name__)
+        return (not column.unique, not column.foreign_key, type_name == "Boolean")
+
+    names = []
+    for name in sorted(dict.fromkeys(equality), key=rank) + ordering + ranges:
+        if name not in names:
+            names.append(name)
+    if not names:
+        return None
+    table = model._table
+    return f"CREATE INDEX idx_{table}_{'_'.join(names)} ON {table} ({', '.join(names)})"
+
+
+# Write the collected shapes to a JSON file, for `python -m orm.explain`.
+def dump(path):
+    import json
+
+    with open(path, "w") as f:
+        json.dump([shape.to_dict() for shape in shapes()], f, indent=2)
+
+
+# Read shapes from one or more dump files, adding up the statistics of equal shapes.
+def load(*paths):
+    import json
+
+    merged = {}
+    for path in paths:
+        with open(path) as f:
+            for data in json.load(f):
+                shape = QueryShape.from_dict(data)
+                known = merged.get(shape.sql)
+                if known is None:
+                    merged[shape.sql] = shape
+                    continue
+                known.calls += shape.calls
+                known.total_seconds += shape.total_seconds
+                known.max_seconds = max(known.max_seconds, shape.max_seconds)
+                known.rows += shape.rows
+                if known.plan is None:
+                    known.plan, known.findings = shape.plan, shape.findings
+                    known.suggestion, known.error = shape.suggestion, shape.error
+    return list(merged.values())
+
+
+# Return a text report of query shapes ranked by observed cost (calls x mean time).
+def report(limit=20, min_rows=None, only_flagged=False, source=None):
+    ranked = sorted(shapes() if source is None else source, key=lambda s: s.total_seconds, reverse=True)
+    if only_flagged:
+        ranked = [shape for shape in ranked if shape.flagged(min_rows)]
+    lines = []
+    for rank, shape in enumerate(ranked[:limit], 1):
+        lines.append(
+            f"{rank:>3}. {shape.total_seconds * 1000:10.2f} ms total = {shape.calls} calls x "
+            f"{shape.mean_seconds() * 1000:.3f} ms (max {shape.max_seconds * 1000:.3f} ms, "
+            f"{shape.rows} rows)  [{shape.model or '-'}]"
+        )
+        lines.append(f"     {shape.sql}")
+        for finding in shape.flagged(min_rows):
+            rows = "?" if finding["rows"] is None else finding["rows"]
+            lines.append(f"     ! {finding['kind'].replace('_', ' ')} on {finding['table']} ({rows} rows)")
+        if shape.flagged(min_rows) and shape.suggestion:
+            lines.append(f"     suggest: {shape.suggestion}")
+        if shape.error:
+            lines.append(f"     explain failed: {shape.error}")
+    return "\n".join(lines) if lines else "No query shapes recorded."
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m orm.explain",
+                                     description="Rank ORM query shapes by calls x mean time.")
+    parser.add_argument("dumps", nargs="+", help="files written by explain.dump() / enable(dump_path=...)")
+    parser.add_argument("--limit", type=int, default=20, help="number of shapes to show")
+    parser.add_argument("--min-rows", type=int, default=1000, help="ignore findings on smaller tables")
+    parser.add_argument("--flagged", action="store_true", help="only show shapes with findings")
+    args = parser.parse_args(argv)
+    print(report(args.limit, args.min_rows, args.flagged, source=load(*args.dumps)))
+
+
+if __name__ == "__main__":
+    main()
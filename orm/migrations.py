@@ -19,7 +19,7 @@
 #   - Handle exceptions with appropriate error messages.
 #   - Commit the transaction if the operation is successful, and rollback if there is an error.
 
-from dbconnectors import MySQL
+from .dbconnectors import MySQL
 
 class Migrations:
 
@@ -0,0 +1,143 @@
+# sequences.py
+#
+# This file defines the hi/lo primary-key allocator used by the ORM. Instead of inserting a
+# row and reading back `lastrowid`, each model reserves a whole block of ids from a shared
+# sequence table in one UPDATE and then hands those ids out locally, in memory.
+#
+# This lets the ORM give an object its id before the row is written, so a parent object
+# (e.g. a `Customer`) and its children (e.g. `Rental` rows pointing at `customer_id`) can be
+# built entirely in memory and written together in one batched flush.
+#
+# The sequence table looks like this:
+#
+#   CREATE TABLE orm_sequence (
+#       name VARCHAR(100) PRIMARY KEY,   -- one row per model table
+#       next_id BIGINT NOT NULL          -- first id that has not been handed out yet
+#   )
+#
+# Safety:
+#   - Thread-safe: each allocator guards its local block with a lock.
+#   - Multi-process-safe: a block is reserved with `UPDATE ... SET next_id = next_id + n`,
+#     which row-locks the sequence row until the transaction commits. Two processes can
+#     never receive overlapping blocks.
+#   - The first reservation for a table seeds the sequence from `MAX(id) + 1`, so rows that
+#     were inserted before the allocator existed are never reused.
+#
+# Example usage:
+#
+#   allocator = get_allocator("customer", MySQL(), block_size=50)
+#   allocator.next_id()      # -> 1   (one round trip reserves ids 1..50)
+#   allocator.next_ids(3)    # -> [2, 3, 4]   (no round trip)
+
+import threading
+
+
+SEQUENCE_TABLE = "orm_sequence"
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+class HiLoAllocator:
+
+    # Initialize an allocator for one sequence (normally one model table).
+    def __init__(self, name, db, table=None, block_size=50, start=None):
+        self.name = name
+        self.db = db
+        self.table = table or name
+        self.block_size = block_size
+        self.start = start  # optional callable giving the first id, e.g. MAX(id) over all shards
+        self._next = 0
+        self._limit = 0  # exclusive upper bound of the block held locally
+        self._ready = False
+        self._lock = threading.Lock()
+
+    # Return a single new id.
+    def next_id(self):
+        return self.next_ids(1)[0]
+
+    # Return `count` new ids, reserving more blocks from the database only when needed.
+    def next_ids(self, count):
+        ids = []
+        with self._lock:
+            while len(ids) < count:
+                if self._next >= self._limit:
+                    self._reserve(max(self.block_size, count - len(ids)))
+                take = min(count - len(ids), self._limit - self._next)
+                ids.extend(range(self._next, self._next + take))
+                self._next += take
+        return ids
+
+    # Reserve `size` ids from the sequence table and make them the local block.
+    def _reserve(self, size):
+        conn = self.db.connect()
+        cursor = conn.cursor()
+        try:
+            if not self._ready:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {SEQUENCE_TABLE} "
+                    f"(name VARCHAR(100) PRIMARY KEY, next_id BIGINT NOT NULL)"
+                )
+                conn.commit()
+                self._ready = True
+
+            update = f"UPDATE {SEQUENCE_TABLE} SET next_id = next_id + %s WHERE name = %s"
+            cursor.execute(update, (size, self.name))
+            if cursor.rowcount == 0:
+                self._seed(cursor)
+                cursor.execute(update, (size, self.name))
+
+            cursor.execute(f"SELECT next_id FROM {SEQUENCE_TABLE} WHERE name = %s", (self.name,))
+            row = cursor.fetchone()
+            if row is None:
+                raise RuntimeError(f"Sequence row for {self.name} is missing from {SEQUENCE_TABLE}")
+            high = row[0]
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Id reservation failed: {e}")
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        self._next, self._limit = high - size, high
+
+    # Create the sequence row for this table, starting after the highest existing id.
+    # Losing the race to another process that seeded it first is fine; any other error is raised.
+    def _seed(self, cursor):
+        try:
+            if self.start is not None:
+                cursor.execute(
+                    f"INSERT INTO {SEQUENCE_TABLE} (name, next_id) VALUES (%s, %s)",
+                    (self.name, self.start()),
+                )
+            else:
+                cursor.execute(
+                    f"INSERT INTO {SEQUENCE_TABLE} (name, next_id) "
+                    f"SELECT %s, COALESCE(MAX(id), 0) + 1 FROM {self.table}",
+                    (self.name,),
+                )
+        except Exception:
+            cursor.execute(f"SELECT 1 FROM {SEQUENCE_TABLE} WHERE name = %s", (self.name,))
+            if cursor.fetchone() is None:
+                raise
+            # Another process seeded the row first; the retried UPDATE will lock it.
+
+
+# Return the process-wide allocator for a sequence on a connector, creating it on first use.
+# The allocator keeps a reference to `db`, so `id(db)` is not reused while it is cached.
+def get_allocator(name, db, table=None, block_size=50, start=None):
+    key = (id(db), name)
+    with _allocators_lock:
+        allocator = _allocators.get(key)
+        if allocator is None:
+            allocator = HiLoAllocator(name, db, table=table, block_size=block_size, start=start)
+            _allocators[key] = allocator
+        return allocator
+
+
+# Forget every cached allocator, e.g. after models are bound to another connector. Ids left in
+# the dropped blocks are never handed out.
+def reset_allocators():
+    with _allocators_lock:
+        _allocators.clear()
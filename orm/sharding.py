@@ -0,0 +1,326 @@
+# sharding.py
+#
+# This file defines horizontal sharding for ORM models. A sharded model declares the column
+# its rows are distributed by, and every model is bound to a `ShardedDatabase` that owns one
+# connector per shard:
+#
+#   class Rental(Base):
+#       shard_key = 'customer_id'
+#       ...
+#
+#   Base.use(ShardedDatabase([SQLite("shard0.db"), SQLite("shard1.db")], HashSharding()))
+#
+# Routing:
+#   - `save()` writes a row to the shard chosen by its shard key value.
+#   - `query()` with the shard key among its filters reads from that one shard.
+#   - `get()`, `get_all()`, `query()` without the shard key, `delete()` and `aggregate()` are
+#     scattered to every shard in parallel on a thread pool and gathered back. Each shard's
+#     rows are streamed with fetchmany() into a small bounded queue, so memory does not grow
+#     with the result size. Unordered results are chained shard by shard; results with an
+#     ORDER BY (see `Base.order_by()`) are merged with `heapq.merge` over the shard streams,
+#     so they keep the global order (and LIMIT).
+#   - Models without a `shard_key` (e.g. Customer, Product) live on the first ("home") shard,
+#     which also holds the id sequence table. Every shard therefore draws ids from the same
+#     sequence, so ids are unique across shards.
+#
+# Limitations: `transaction()` pins only the home shard, so it does not span shards, and
+# changing a saved row's shard key value does not move the row to another shard.
+
+import bisect
+import functools
+import heapq
+import queue
+import re
+import threading
+import zlib
+
+
+# Shard targets understood by `ShardedDatabase.connect()`.
+ALL_SHARDS = object()
+HOME_SHARD = object()
+
+# Rows fetched from a shard at a time, and chunks buffered per shard ahead of the consumer.
+STREAM_CHUNK = 500
+STREAM_BUFFER = 4
+
+_END = object()
+
+
+def put_until_stopped(output, item, stop):
+    """
+    Put `item` on a bounded queue, blocking while the consumer is behind, but give up once
+    `stop` (a threading.Event) is set. Returns True if the item was queued.
+
+    Used by the producer threads of shard streams and of `Base.parallel_scan()`.
+    """
+    while not stop.is_set():
+        try:
+            output.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+_ORDER_BY = re.compile(r"\sORDER BY\s+(.+?)(?:\s+LIMIT\s+(\d+))?\s*$", re.IGNORECASE | re.DOTALL)
+
+
+class HashSharding:
+    # Spread rows evenly: integers by modulo, anything else by CRC32 of its text.
+    def shard_for(self, value, count):
+        if isinstance(value, int):
+            return value % count
+        return zlib.crc32(str(value).encode("utf-8")) % count
+
+
+class RangeSharding:
+    # Keep contiguous key ranges together. `bounds` are the exclusive upper bounds of every
+    # shard but the last, e.g. RangeSharding([1000, 2000]) -> <1000, 1000..1999, >=2000.
+    def __init__(self, bounds):
+        self.bounds = sorted(bounds)
+
+    def shard_for(self, value, count):
+        return bisect.bisect_right(self.bounds, value)
+
+
+class ShardedDatabase:
+    def __init__(self, shards, strategy=None, max_workers=None):
+        """
+        Args:
+            shards: list of connectors (MySQL, SQLite, ReplicatedDatabase, ...), one per shard
+            strategy: HashSharding() (default) or RangeSharding(bounds)
+            max_workers: threads used for scatter-gather (default: 4 per shard)
+        """
+        self.shards = list(shards)
+        self.strategy = strategy or HashSharding()
+        if isinstance(self.strategy, RangeSharding) and len(self.strategy.bounds) != len(self.shards) - 1:
+            raise ValueError("RangeSharding needs one bound fewer than there are shards")
+        self.max_workers = max_workers or 4 * len(self.shards)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def shard_for(self, value):
+        """Return the index of the shard that owns a shard key value."""
+        if value is None:
+            raise ValueError("A sharded row needs a shard key value")
+        return self.strategy.shard_for(value, len(self.shards))
+
+    def connect(self, readonly=False, key=HOME_SHARD):
+        """
+        Return a connection for one operation.
+
+        Args:
+            key: HOME_SHARD for unsharded models and the id sequence, ALL_SHARDS for a
+                scatter-gather connection, or a shard key value to reach the shard owning it
+        """
+        if key is HOME_SHARD:
+            return self.shards[0].connect(readonly=readonly)
+        if key is ALL_SHARDS:
+            return _ScatterConnection(self, range(len(self.shards)), readonly)
+        return self.connect_shard(self.shard_for(key), readonly=readonly)
+
+    def connect_shard(self, index, readonly=False):
+        """Return a connection to one shard by index."""
+        return self.shards[index].connect(readonly=readonly)
+
+    def max_id(self, table):
+        """Return the highest id of a table across every shard (0 if all are empty)."""
+        conn = self.connect(readonly=True, key=ALL_SHARDS)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT MAX(id) FROM {table}")
+            return max((row[0] for row in cursor.fetchall() if row[0] is not None), default=0)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="orm-shard")
+            return self._pool
+
+
+class _ScatterConnection:
+    # Looks like a single connection to the ORM, but runs each statement on several shards
+    # in parallel. Each shard keeps its own connection until commit()/rollback()/close().
+    def __init__(self, database, indexes, readonly):
+        self._database = database
+        self._indexes = list(indexes)
+        self._readonly = readonly
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def _connection(self, index):
+        with self._lock:
+            conn = self._connections.get(index)
+        if conn is None:
+            conn = self._database.connect_shard(index, readonly=self._readonly)
+            with self._lock:
+                self._connections[index] = conn
+        return conn
+
+    def cursor(self, dictionary=False):
+        return _ScatterCursor(self, dictionary)
+
+    def commit(self):
+        for conn in self._connections.values():
+            conn.commit()
+
+    def rollback(self):
+        for conn in self._connections.values():
+            conn.rollback()
+
+    def close(self):
+        for conn in self._connections.values():
+            conn.close()
+        self._connections = {}
+
+
+class _ShardStream:
+    # One shard's part of a scatter-gather statement. A pool thread executes it and feeds the
+    # rows, STREAM_CHUNK at a time, into a queue holding at most STREAM_BUFFER chunks.
+    def __init__(self, dictionary):
+        self.rowcount = -1
+        self.description = None
+        self.error = None
+        self._dictionary = dictionary
+        self._queue = queue.Queue(STREAM_BUFFER)
+        self._executed = threading.Event()
+        self._stop = threading.Event()
+        self._done = threading.Event()
+
+    def run(self, connection, index, sql, params):
+        cursor = None
+        try:
+            cursor = connection._connection(index).cursor(dictionary=self._dictionary)
+            cursor.execute(sql, params)
+            self.rowcount, self.description = cursor.rowcount, cursor.description
+            if self.description is not None:
+                self._executed.set()
+                while not self._stop.is_set():
+                    rows = cursor.fetchmany(STREAM_CHUNK)
+                    if not rows or not self._put(rows):
+                        break
+        except Exception as e:
+            self.error = e
+            self._put(e)
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self._executed.set()  # statements without rows are reported once finished
+            self._put(_END)
+            self._done.set()
+
+    def wait_executed(self):
+        """Block until the shard ran the statement; raise its error if it failed."""
+        self._executed.wait()
+        if self.error is not None:
+            raise self.error
+
+    def rows(self):
+        """Yield the shard's rows as they arrive."""
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield from item
+
+    def stop(self):
+        """Stop fetching and wait until the shard's cursor is closed."""
+        self._stop.set()
+        while not self._done.wait(0.05):
+            try:
+                self._queue.get_nowait()  # unblock a producer waiting for room
+            except queue.Empty:
+                pass
+
+    def _put(self, item):
+        return put_until_stopped(self._queue, item, self._stop)
+
+
+class _ScatterCursor:
+    def __init__(self, connection, dictionary):
+        self._connection = connection
+        self._dictionary = dictionary
+        self._streams = []
+        self._rows = iter(())
+        self.rowcount = -1
+        self.description = None
+
+    def execute(self, sql, params=()):
+        """Start the statement on every shard in parallel and prepare the merged row stream."""
+        self.close()
+        pool = self._connection._database._executor()
+        self._streams = [_ShardStream(self._dictionary) for _ in self._connection._indexes]
+        for stream, index in zip(self._streams, self._connection._indexes):
+            pool.submit(stream.run, self._connection, index, sql, params)
+        try:
+            for stream in self._streams:
+                stream.wait_executed()
+        except Exception:
+            self.close()
+            raise
+        self.rowcount = sum(max(stream.rowcount, 0) for stream in self._streams)
+        self.description = next((s.description for s in self._streams if s.description), None)
+        self._rows = self._merge(sql)
+
+    def _merge(self, sql):
+        streams = [stream.rows() for stream in self._streams]
+        match = _ORDER_BY.search(sql)
+        if match is None or self.description is None:
+            return (row for rows in streams for row in rows)
+        order = _parse_order(match.group(1))
+        names = [d[0] for d in self.description]
+        key = _sort_key(order, None if self._dictionary else names)
+        merged = heapq.merge(*streams, key=key)
+        if match.group(2) is not None:
+            merged = (row for _, row in zip(range(int(match.group(2))), merged))
+        return merged
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def fetchmany(self, size=1):
+        return [row for _, row in zip(range(size), self._rows)]
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        for stream in self._streams:
+            stream.stop()
+        self._streams = []
+        self._rows = iter(())
+
+
+def _parse_order(clause):
+    # "rental_date DESC, id" -> [("rental_date", True), ("id", False)]
+    order = []
+    for part in clause.split(","):
+        words = part.split()
+        order.append((words[0], len(words) > 1 and words[1].upper() == "DESC"))
+    return order
+
+
+def _sort_key(order, names=None):
+    # Build a merge key for rows (dicts, or tuples when `names` gives the column positions).
+    # NULLs sort first, as in MySQL.
+    positions = [(names.index(name) if names else name, desc) for name, desc in order]
+
+    def compare(a, b):
+        for position, desc in positions:
+            x, y = a[position], b[position]
+            if x == y:
+                continue
+            if x is None or (y is not None and x < y):
+                result = -1
+            else:
+                result = 1
+            return -result if desc else result
+        return 0
+
+    return functools.cmp_to_key(compare)
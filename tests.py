@@ -19,7 +19,353 @@
 # NOTE: This is not a formal unit test file. You are encouraged to add and run meaningful tests
 # here as you build your ORM functionality.
 
-from models.models import Customer, Product, Rental
+import os
+import sys
+import tempfile
+
+from models import Customer, Product, Rental
+from orm.base import Base
+from orm.dbconnectors import SQLite
+
+
+# --- SQLITE-BACKED CHECKS ---
+# These checks need no MySQL server: `python tests.py --sqlite` runs only them. Each one binds
+# the models to fresh SQLite files in a temporary directory and asserts on the results.
+
+SCHEMA = {
+    "customer": "id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT, phone TEXT, address TEXT, is_active INTEGER",
+    "product": "id INTEGER PRIMARY KEY, name TEXT NOT NULL, brand TEXT, category TEXT, price_per_day REAL, in_stock INTEGER",
+    "rental": "id INTEGER PRIMARY KEY, customer_id INTEGER, product_id INTEGER, rental_date TEXT, return_date TEXT, total_price REAL",
+}
+
+_tmp = tempfile.mkdtemp(prefix="orm-tests-")
+
+
+# Return a SQLite connector on a new file in the temporary directory, with the model tables.
+def sqlite_db(name, tables=tuple(SCHEMA)):
+    path = os.path.join(_tmp, name)
+    if os.path.exists(path):
+        os.remove(path)
+    db = SQLite(path)
+    conn = db.connect()
+    for table in tables:
+        conn.execute(f"CREATE TABLE {table} ({SCHEMA[table]})")
+    conn.commit()
+    conn.close()
+    return db
+
+
+# Hi/lo ids: assigned before the INSERT, unique, and drawn from the connector in use.
+def check_hilo_ids():
+    first, second = sqlite_db("ids1.db"), sqlite_db("ids2.db")
+    Base.use(first)
+    customers = [Customer(name=f"c{i}") for i in range(3)]
+    for customer in customers:
+        customer.save()
+    assert [c.id for c in customers] == [1, 2, 3]
+
+    Base.use(second)  # the allocator follows the new connector
+    customer = Customer(name="other")
+    customer.save()
+    assert customer.id == 1 and Customer.count() == 1
+
+    Base.use(sqlite_db("ids3.db", tables=()))  # a missing table is reported, not hidden
+    try:
+        Customer(name="x").assign_id()
+    except Exception as e:
+        assert "no such table" in str(e), e
+    else:
+        raise AssertionError("assign_id() without a table should fail")
+
+
+# Deferred columns: loaded in one batch on first access, never over a value the user assigned.
+def check_deferred_columns():
+    Base.use(sqlite_db("deferred.db"))
+    Base.bulk_save([Customer(name=f"c{i}", address=f"old{i}") for i in range(3)])
+    first, second, third = Customer.get_all()
+    assert "address" not in first.__dict__
+    first.address = "NEW"
+    assert second.address == "old1" and third.__dict__["address"] == "old2"
+    assert first.address == "NEW"
+    first.save()
+    assert Customer.only("id", "address").get("customer", first.id).address == "NEW"
+
+
+# Codecs: bad values and missing NOT NULL columns are rejected before any SQL is sent.
+def check_validation():
+    from decimal import Decimal
+    from orm.datatypes import ValidationError
+
+    Base.use(sqlite_db("validate.db"))
+    cases = [
+        [{"email": "x"}],                                      # name (NOT NULL) missing
+        [{"name": "ok", "phone": "9" * 16}],                   # longer than VARCHAR(15)
+        [{"name": "ok"}] * 999 + [{"name": "ok", "phone": "9" * 2000000}],
+    ]
+    for rows in cases:
+        try:
+            Customer.validate_batch(rows, new=True)
+        except ValidationError as e:
+            assert len(e.errors) == 1, e
+        else:
+            raise AssertionError(f"not rejected: {str(rows)[:60]}")
+    Customer.validate_batch([{"email": "x"}])  # updates may leave columns out
+    try:
+        Product.validate_batch([{"name": "p", "price_per_day": Decimal("sNaN")}])
+    except ValidationError:
+        pass
+    else:
+        raise AssertionError("sNaN price accepted")
+    Customer(email="x").save()  # prints "Insert failed: ..." from validation, not from SQLite
+    assert Customer.count() == 0
+
+
+# Replicas: reads rotate over healthy replicas, stay on the primary right after a write, and a
+# failing replica is ejected by the background probe without any read waiting on it.
+def check_replicas():
+    import time
+    from orm.dbconnectors import ReplicatedDatabase
+
+    class Unreachable:
+        def connect(self, readonly=False):
+            raise ConnectionError("replica down")
+
+    primary, replicas = sqlite_db("primary.db"), [sqlite_db("replica1.db"), sqlite_db("replica2.db")]
+    for i, replica in enumerate(replicas):  # mark each replica's data to see where reads go
+        Base.use(replica)
+        Customer(name=f"replica{i + 1}").save()
+    db = ReplicatedDatabase(primary, replicas, read_your_writes=0.2, health_interval=0.05)
+    Base.use(db)
+    served = {Customer.get_all()[0].name for _ in range(4)}
+    assert served == {"replica1", "replica2"}, served
+    assert [replica.busy for replica in db.replicas] == [0, 0]
+
+    Customer(name="primary").save()
+    assert Customer.get_all()[0].name == "primary"  # read-your-writes
+    time.sleep(0.25)
+    assert Customer.get_all()[0].name.startswith("replica")
+
+    down = ReplicatedDatabase(primary, [Unreachable()], health_interval=0.05, max_failures=2)
+    Base.use(down)
+    Customer.get_all()
+    time.sleep(0.3)  # the probe thread ejects it
+    assert down.replicas[0].ejected_until > time.monotonic()
+    db.close()
+    down.close()
+
+
+# Sharding: rows go to the shard of their key, scatter-gather reads stream every shard (in
+# small chunks here) and keep the global ORDER BY; an abandoned stream is shut down cleanly.
+def check_sharding():
+    import random
+    from orm import sharding
+    from orm.sharding import ALL_SHARDS, ShardedDatabase
+
+    db = ShardedDatabase([sqlite_db(f"shard{i}.db") for i in range(3)])
+    Base.use(db)
+    customers = [Customer(name=f"c{i}") for i in range(10)]
+    for customer in customers:
+        customer.assign_id()
+    rentals = [Rental(customer_id=c.id, total_price=float(random.randint(1, 500))) for c in customers for _ in range(20)]
+    Base.bulk_save(customers + rentals)
+    for i, shard in enumerate(db.shards):
+        conn = shard.connect()
+        owners = {row[0] for row in conn.execute("SELECT customer_id FROM rental")}
+        conn.close()
+        assert all(db.shard_for(owner) == i for owner in owners)
+
+    chunk, sharding.STREAM_CHUNK = sharding.STREAM_CHUNK, 3
+    try:
+        prices = [r.total_price for r in Rental.order_by("total_price", "id").get_all()]
+        assert prices == sorted(r.total_price for r in rentals)
+        assert len(Rental.query(customer_id=customers[0].id)) == 20 and Rental.count() == 200
+
+        conn = db.connect(readonly=True, key=ALL_SHARDS)
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM rental ORDER BY id")
+        assert [row[0] for row in cursor.fetchmany(5)] == sorted(r.id for r in rentals)[:5]
+        cursor.close()  # stops the shard streams with rows left unread
+        conn.close()
+    finally:
+        sharding.STREAM_CHUNK = chunk
+
+
+# Parallel scans: every row exactly once (in key order when asked), and a worker failure is
+# raised to the caller instead of ending the scan early.
+def check_parallel_scan():
+    import time
+    from orm.dbconnectors import SQLite
+
+    db = sqlite_db("scan.db")
+    Base.use(db)
+    Base.bulk_save([Customer(name=f"c{i}") for i in range(2000)])
+    ids = [c.id for c in Customer.parallel_scan(workers=4, chunk_size=100)]
+    assert sorted(ids) == list(range(1, 2001))
+    ordered = [c.id for c in Customer.parallel_scan(workers=4, chunk_size=100, ordered=True)]
+    assert ordered == list(range(1, 2001))
+
+    # Sharded: more workers than the scatter-gather pool has threads, with small shard
+    # chunks, must neither hang nor lose the global order (also with fewer workers than shards).
+    from orm import sharding
+    from orm.sharding import ShardedDatabase
+
+    Base.use(ShardedDatabase([sqlite_db(f"scanshard{i}.db") for i in range(3)]))
+    customers = [Customer(name=f"c{i}") for i in range(30)]
+    for customer in customers:
+        customer.assign_id()
+    Base.bulk_save(customers + [Rental(customer_id=customers[i % 30].id) for i in range(3000)])
+    chunk, sharding.STREAM_CHUNK = sharding.STREAM_CHUNK, 2
+    try:
+        for workers in (16, 1):
+            scanned = [r.id for r in Rental.parallel_scan(workers=workers, partitions=16, chunk_size=10, ordered=True)]
+            assert scanned == sorted(scanned) and len(set(scanned)) == 3000
+        assert len(list(Rental.parallel_scan(workers=16, partitions=16, chunk_size=10))) == 3000
+    finally:
+        sharding.STREAM_CHUNK = chunk
+
+    class FailingCursor:
+        def __init__(self, cursor):
+            self.cursor = cursor
+
+        def fetchmany(self, size):
+            time.sleep(0.05)
+            raise RuntimeError("connection lost")
+
+        def __getattr__(self, name):
+            return getattr(self.cursor, name)
+
+    class FailingConnection:
+        def __init__(self, connection):
+            self.connection = connection
+
+        def cursor(self, dictionary=False):
+            return FailingCursor(self.connection.cursor(dictionary=dictionary))
+
+        def __getattr__(self, name):
+            return getattr(self.connection, name)
+
+    class Failing(SQLite):
+        def connect(self, readonly=False):
+            return FailingConnection(super().connect(readonly)) if readonly else super().connect()
+
+    Base.use(Failing(db.path))
+    try:
+        list(Customer.parallel_scan(workers=1, partitions=1))
+    except RuntimeError as e:
+        assert "connection lost" in str(e)
+    else:
+        raise AssertionError("a failed scan returned without an error")
+    try:
+        list(Customer.parallel_scan(workers=0))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("workers=0 accepted")
+
+
+# Async pool: concurrent calls are capped by the pool, replica reads keep rotating and release
+# their busy counts, and a connection whose statement failed is not reused.
+def check_async_pool():
+    import asyncio
+    from orm.dbconnectors import ReplicatedDatabase
+
+    primary, replicas = sqlite_db("aprimary.db"), [sqlite_db("areplica1.db"), sqlite_db("areplica2.db")]
+    for i, replica in enumerate(replicas):
+        Base.use(replica)
+        Customer(name=f"replica{i + 1}").save()
+    db = ReplicatedDatabase(primary, replicas, read_your_writes=0, health_interval=None)
+    Base.use(db)
+
+    async def reads():
+        results = await asyncio.gather(*(Customer.aget_all() for _ in range(20)))
+        return {rows[0].name for rows in results}
+
+    assert asyncio.run(reads()) == {"replica1", "replica2"}
+    assert [replica.busy for replica in db.replicas] == [0, 0]
+
+    Base.use(primary)
+
+    async def writes_then_failure():
+        await Customer(name="async").asave()
+        pool = Customer._async_pool()
+        idle = len(pool._idle[False])
+        await Customer.abulk_save([Customer(name="x", missing_column=1)])  # prints "Bulk save failed"
+        return idle, len(pool._idle[False])
+
+    idle_before, idle_after = asyncio.run(writes_then_failure())
+    assert idle_before == 1 and idle_after == 0
+    assert [c.name for c in Customer.query(name="async")] == ["async"]
+
+    # Pooled connections end their transaction. This connector behaves like MySQL with
+    # autocommit off under REPEATABLE READ: a read keeps its snapshot until rollback/commit.
+    class SnapshotSQLite(SQLite):
+        def connect(self, readonly=False):
+            conn = super().connect(readonly)
+            conn.isolation_level = None
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN")
+            return conn
+
+    snapshot = sqlite_db("snapshot.db")
+    Base.use(SnapshotSQLite(snapshot.path))
+
+    async def reads_after_commit():
+        before = len(await Customer.aget_all())
+        conn = snapshot.connect()  # committed by another connection between the two reads
+        conn.execute("INSERT INTO customer (id, name) VALUES (1000, 'late')")
+        conn.commit()
+        conn.close()
+        return before, len(await Customer.aget_all())
+
+    assert asyncio.run(reads_after_commit()) == (0, 1)
+
+
+# EXPLAIN capture: off by default (not even imported), then records every statement shape,
+# including bulk_save() batches, and flags a full scan with an index suggestion.
+def check_explain():
+    assert "orm.explain" not in sys.modules
+    from orm import explain
+
+    Base.use(sqlite_db("explain.db"))
+    explain.enable(min_rows=100)
+    try:
+        Base.bulk_save([Rental(customer_id=i % 10 + 1, total_price=1.0) for i in range(500)])
+        for customer_id in range(1, 4):
+            Rental.order_by("rental_date").query(customer_id=customer_id)
+        shapes = {shape.sql.split(" ", 1)[0]: shape for shape in explain.shapes()}
+        assert shapes["INSERT"].calls == 1 and shapes["INSERT"].rows == 500
+        select = shapes["SELECT"]
+        assert select.calls == 3 and select.flagged()
+        assert select.suggestion == "CREATE INDEX idx_rental_customer_id_rental_date ON rental (customer_id, rental_date)"
+        assert "INSERT INTO rental" in explain.report()
+    finally:
+        explain.disable()
+        explain.reset()
+
+
+CHECKS = [
+    check_hilo_ids,
+    check_deferred_columns,
+    check_validation,
+    check_replicas,
+    check_sharding,
+    check_parallel_scan,
+    check_async_pool,
+    check_explain,
+]
+
+
+def run_sqlite_checks():
+    for check in CHECKS:
+        check()
+        print(f"{check.__name__}: ok")
+    Base.use(None)
+
+
+if "--sqlite" in sys.argv:
+    run_sqlite_checks()
+    sys.exit(0)
+
 
 # --- CREATE ---
 cust1 = Customer(name="Shaurya", email="shaurya@example.com", phone="9999999999", address="Delhi")